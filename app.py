@@ -1,17 +1,133 @@
-from quart import Quart, request, jsonify, send_from_directory, render_template
+from quart import Quart, Response, request, websocket, jsonify, send_file, render_template, abort
 from quart_cors import cors
-from googletrans import Translator
 import edge_tts
 import asyncio
+import functools
+import hashlib
+import json
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.utils import safe_join
+from tts_cache import TTSCache, DEFAULT_MAX_BYTES
+from audio_store import AudioStore, DEFAULT_MAX_BYTES as AUDIO_STORE_MAX_BYTES, DEFAULT_MAX_AGE
+from translation_cache import TranslationCache, CachedTranslator, TranslationResult, is_cacheable
+from deepseek_api import DeepseekAPI, DEFAULT_BASE_URL as DEEPSEEK_BASE_URL
+from translation_backends import BackendRouter, create_backends
+from single_flight import SingleFlight
+from speech_recognizers import GoogleRecognizer, VoskRecognizer, pick_recognizer
+from segmenter import chunk_text
 
 # 使用 Quart 替代 Flask 以支援異步
 app = Quart(__name__, template_folder='templates')
 app = cors(app)
 
-# 初始化翻譯器
-translator = Translator()
+# 翻譯後端為同步呼叫，放到有上限的執行緒池中執行，避免阻塞事件迴圈
+TRANSLATE_WORKERS = int(os.environ.get('TRANSLATE_WORKERS', 8))
+TRANSLATE_CONCURRENCY = int(os.environ.get('TRANSLATE_CONCURRENCY', TRANSLATE_WORKERS))
+TRANSLATE_TIMEOUT = float(os.environ.get('TRANSLATE_TIMEOUT', 10))
+translate_executor = ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS, thread_name_prefix='translate')
+TRANSLATE_BATCH_CONCURRENCY = int(os.environ.get('TRANSLATE_BATCH_CONCURRENCY', 4))
+TRANSLATE_BATCH_MAX_ITEMS = int(os.environ.get('TRANSLATE_BATCH_MAX_ITEMS', 200))
+
+# 翻譯後端：TRANSLATE_BACKENDS 依偏好順序列出（google、deepseek、local），
+# 路由器依延遲挑選主要後端，逾時未回應時對下一個後端送出對沖請求
+DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY')
+DEEPSEEK_BASE = os.environ.get('DEEPSEEK_BASE_URL', DEEPSEEK_BASE_URL)
+TRANSLATE_HEDGE_MS = os.environ.get('TRANSLATE_HEDGE_MS')
+deepseek_api = DeepseekAPI(DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE) if DEEPSEEK_API_KEY else None
+
+translation_router = BackendRouter(
+    create_backends(os.environ.get('TRANSLATE_BACKENDS'), deepseek_api),
+    hedge_after=float(TRANSLATE_HEDGE_MS) / 1000 if TRANSLATE_HEDGE_MS else None,
+    # 對沖請求可能讓每個翻譯同時佔用兩個執行緒
+    max_workers=TRANSLATE_WORKERS * 2
+)
+
+# 初始化翻譯器（前面加上記憶體 + SQLite 翻譯快取）
+translation_cache = TranslationCache(
+    os.environ.get('TRANSLATION_CACHE_PATH', 'temp/translation_cache.db'),
+    ttl=int(os.environ.get('TRANSLATION_CACHE_TTL', 7 * 24 * 3600))
+)
+translator = CachedTranslator(translation_router, translation_cache)
+
+translate_semaphore = None
+translate_stats = {
+    'requests': 0,
+    'in_flight': 0,
+    'timeouts': 0
+}
+
+# 翻譯後端中有支援串流者（deepseek）時，/translate/stream 經由路由器逐字串流譯文
+translate_stream_stats = {
+    'streams': 0,
+    'tokens': 0,
+    'time_to_first_token_ms': 0.0,
+    'total_ms': 0.0
+}
+
+# WebSocket 對話通道統計
+conversation_stats = {
+    'active_connections': 0,
+    'utterances': 0
+}
+
+# 音頻檔目錄（容量與保存期限由背景清理維持）
+AUDIO_DIR = os.environ.get('AUDIO_DIR', 'temp')
+AUDIO_GC_INTERVAL = int(os.environ.get('AUDIO_GC_INTERVAL', 300))
+# 翻譯快取過期記錄的清理間隔（秒）
+TRANSLATION_PURGE_INTERVAL = int(os.environ.get('TRANSLATION_PURGE_INTERVAL', 3600))
+audio_store = AudioStore(
+    AUDIO_DIR,
+    max_bytes=int(os.environ.get('AUDIO_STORE_MAX_BYTES', AUDIO_STORE_MAX_BYTES)),
+    max_age=int(os.environ.get('AUDIO_MAX_AGE', DEFAULT_MAX_AGE))
+)
+audio_gc_task = None
+translation_purge_task = None
+
+# /audio 傳輸設定
+AUDIO_READ_CHUNK = 256 * 1024
+AUDIO_CACHE_MAX_AGE = 365 * 24 * 3600
+audio_etags = OrderedDict()  # (路徑, 修改時間, 大小) -> 內容雜湊
+audio_etags_lock = threading.Lock()  # file_etag 在多個執行緒中執行
+
+# 語音快取（檔案以內容雜湊命名放在音頻目錄，可直接由 /audio 提供）
+tts_cache = TTSCache(AUDIO_DIR, max_bytes=int(os.environ.get('TTS_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)))
+
+# 長文依句子分段並行合成，依序輸出
+TTS_CHUNK_CHARS = int(os.environ.get('TTS_CHUNK_CHARS', 120))
+TTS_CHUNK_CONCURRENCY = int(os.environ.get('TTS_CHUNK_CONCURRENCY', 3))
+tts_stream_stats = {
+    'streams': 0,
+    'chunks': 0,
+    'time_to_first_audio_ms': 0.0,
+    'total_synthesis_ms': 0.0
+}
+
+# 伺服器端語音辨識（/transcribe）：辨識在有上限的執行緒池中執行，不佔用事件迴圈；
+# 設定 VOSK_MODEL_DIR 時優先使用本機串流辨識
+TRANSCRIBE_SAMPLE_RATE = 16000
+TRANSCRIBE_WORKERS = int(os.environ.get('TRANSCRIBE_WORKERS', 2))
+TRANSCRIBE_MAX_PENDING = int(os.environ.get('TRANSCRIBE_MAX_PENDING', TRANSCRIBE_WORKERS * 2))
+TRANSCRIBE_MAX_SECONDS = int(os.environ.get('TRANSCRIBE_MAX_SECONDS', 30))
+transcribe_executor = ThreadPoolExecutor(max_workers=TRANSCRIBE_WORKERS, thread_name_prefix='transcribe')
+speech_recognizers = [GoogleRecognizer()]
+if os.environ.get('VOSK_MODEL_DIR'):
+    speech_recognizers.insert(0, VoskRecognizer(os.environ['VOSK_MODEL_DIR'], sample_rate=TRANSCRIBE_SAMPLE_RATE))
+transcribe_stats = {
+    'requests': 0,
+    'active': 0,
+    'rejected': 0,
+    'bytes': 0
+}
+
+# 合併進行中的相同翻譯與語音合成請求
+translate_flight = SingleFlight()
+tts_flight = SingleFlight()
 
 # 語音設置
 VOICE_OPTIONS = {
@@ -25,9 +141,197 @@ VOICE_OPTIONS = {
     "vi": "vi-VN-HoaiMyNeural"
 }
 
+def get_translate_semaphore():
+    """在事件迴圈中延遲建立併發限制"""
+    global translate_semaphore
+    if translate_semaphore is None:
+        translate_semaphore = asyncio.Semaphore(TRANSLATE_CONCURRENCY)
+    return translate_semaphore
+
+async def translate_async(text, src='auto', dest='en', timeout=None):
+    """在執行緒池中翻譯，超過期限時拋出 asyncio.TimeoutError"""
+    timeout = TRANSLATE_TIMEOUT if timeout is None else min(float(timeout), TRANSLATE_TIMEOUT)
+    loop = asyncio.get_running_loop()
+    
+    async def run():
+        async with get_translate_semaphore():
+            translate_stats['in_flight'] += 1
+            try:
+                return await loop.run_in_executor(
+                    translate_executor,
+                    functools.partial(translator.translate, text, src=src, dest=dest)
+                )
+            finally:
+                translate_stats['in_flight'] -= 1
+    
+    translate_stats['requests'] += 1
+    key = translation_cache.make_key(text, src, dest)
+    try:
+        # 期限同時涵蓋排隊等待與上游呼叫；相同請求共用一次上游呼叫
+        return await asyncio.wait_for(translate_flight.do(key, run), timeout)
+    except asyncio.TimeoutError:
+        translate_stats['timeouts'] += 1
+        raise
+
+async def stream_translation(text, src, dest, cache_key):
+    """經由翻譯路由器逐字產生譯文（依延遲選擇後端、對沖與容錯轉移），完成後寫入翻譯快取
+
+    整個串流（包括排隊等待）受 TRANSLATE_TIMEOUT 期限限制，逾時拋出 asyncio.TimeoutError
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + TRANSLATE_TIMEOUT
+    tokens = asyncio.Queue()
+    cancelled = threading.Event()
+    
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(tokens.put_nowait, item)
+        except RuntimeError:
+            # 事件迴圈已關閉
+            cancelled.set()
+    
+    def produce():
+        # 路由器的串流為同步產生器，在翻譯執行緒池中讀取後轉交事件迴圈
+        stream = translation_router.stream(text, src=src, dest=dest)
+        try:
+            for token in stream:
+                if cancelled.is_set():
+                    return
+                put(('token', token))
+        except Exception as e:
+            put(('error', e))
+            return
+        finally:
+            stream.close()
+        put(('done', None))
+    
+    translate_stats['requests'] += 1
+    translate_stats['in_flight'] += 1
+    loop.run_in_executor(translate_executor, produce)
+    parts = []
+    try:
+        while True:
+            try:
+                kind, value = await asyncio.wait_for(tokens.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                translate_stats['timeouts'] += 1
+                raise
+            if kind == 'error':
+                raise value
+            if kind == 'done':
+                break
+            parts.append(value)
+            yield value
+    finally:
+        cancelled.set()
+        translate_stats['in_flight'] -= 1
+    result = TranslationResult(''.join(parts).strip(), src, dest)
+    if is_cacheable(text, result, src, dest):
+        await loop.run_in_executor(translate_executor, translation_cache.put, cache_key, result)
+
+async def single_chunk(value):
+    yield value
+
+async def stream_synthesis(text, voice, rate, pitch, cache_key):
+    """分段並行合成並依序產生 MP3 區塊，完成後寫入語音快取"""
+    chunks = chunk_text(text, TTS_CHUNK_CHARS) or [text]
+    queues = [asyncio.Queue() for _ in chunks]
+    semaphore = asyncio.Semaphore(TTS_CHUNK_CONCURRENCY)
+    
+    async def synthesize_chunk(index, sentence):
+        async with semaphore:
+            try:
+                communicate = edge_tts.Communicate(sentence, voice, rate=rate, pitch=pitch)
+                async for chunk in communicate.stream():
+                    if chunk['type'] == 'audio':
+                        queues[index].put_nowait(chunk['data'])
+            except Exception as e:
+                queues[index].put_nowait(e)
+            finally:
+                queues[index].put_nowait(None)
+    
+    started = time.perf_counter()
+    first_audio = None
+    tasks = [asyncio.ensure_future(synthesize_chunk(i, c)) for i, c in enumerate(chunks)]
+    temp_filename = tts_cache.temp_path_for(cache_key)
+    completed = False
+    try:
+        with open(temp_filename, 'wb') as f:
+            # 依順序輸出各段，第一段的區塊一到就送出
+            for chunk_queue in queues:
+                while True:
+                    data = await chunk_queue.get()
+                    if data is None:
+                        break
+                    if isinstance(data, Exception):
+                        raise data
+                    if first_audio is None:
+                        first_audio = time.perf_counter()
+                    f.write(data)
+                    yield data
+        completed = True
+    finally:
+        for task in tasks:
+            task.cancel()
+        if completed:
+            tts_cache.put(cache_key, temp_filename)
+            tts_stream_stats['streams'] += 1
+            tts_stream_stats['chunks'] += len(chunks)
+            tts_stream_stats['time_to_first_audio_ms'] += ((first_audio or started) - started) * 1000
+            tts_stream_stats['total_synthesis_ms'] += (time.perf_counter() - started) * 1000
+        elif os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+async def synthesize_to_cache(text, voice, rate, pitch, cache_key):
+    """合成語音（或加入進行中的相同合成）並回傳快取檔路徑"""
+    async for _ in tts_flight.stream(cache_key, stream_synthesis, text, voice, rate, pitch, cache_key):
+        pass
+    return tts_cache.path_for(cache_key)
+
+async def speech_file_for(text, voice, rate='+0%', pitch='+0Hz'):
+    """取得語音檔路徑，相同文字與語音設定直接使用快取"""
+    cache_key = tts_cache.make_key(text, voice, rate, pitch)
+    filename = tts_cache.get(cache_key)
+    if not filename:
+        filename = await synthesize_to_cache(text, voice, rate, pitch, cache_key)
+    return filename
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+async def speech_bytes_for(text, voice, rate='+0%', pitch='+0Hz'):
+    """取得語音資料，在執行緒池中讀檔；檔案在讀取前被清理或淘汰時重新合成一次"""
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        filename = await speech_file_for(text, voice, rate, pitch)
+        try:
+            return await loop.run_in_executor(None, read_file, filename)
+        except FileNotFoundError:
+            if attempt:
+                raise
+
+@app.before_serving
+async def startup():
+    global audio_gc_task, translation_purge_task
+    audio_gc_task = asyncio.ensure_future(audio_store.run_gc(AUDIO_GC_INTERVAL))
+    translation_purge_task = asyncio.ensure_future(translation_cache.run_purge(TRANSLATION_PURGE_INTERVAL))
+
+@app.after_serving
+async def shutdown():
+    if audio_gc_task:
+        audio_gc_task.cancel()
+    if translation_purge_task:
+        translation_purge_task.cancel()
+    if deepseek_api:
+        deepseek_api.close()
+    translate_executor.shutdown(wait=False)
+    transcribe_executor.shutdown(wait=False)
+    translation_router.shutdown()
+
 @app.route('/')
 async def index():
-    return await render_template('index.html')
+    return await render_template('index.html', stream_translation=translation_router.can_stream)
 
 @app.route('/translate', methods=['POST'])
 async def translate():
@@ -38,7 +342,8 @@ async def translate():
         target_lang = data.get('target_lang', 'en')
 
         # 執行翻譯
-        translation = translator.translate(text, src=source_lang, dest=target_lang)
+        translation = await translate_async(
+            text, src=source_lang, dest=target_lang, timeout=data.get('timeout'))
         
         return jsonify({
             'success': True,
@@ -46,6 +351,158 @@ async def translate():
             'source_lang': translation.src,
             'target_lang': translation.dest
         })
+    except asyncio.TimeoutError:
+        return jsonify({
+            'success': False,
+            'error': 'translation timed out'
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/translate/stream', methods=['POST'])
+async def translate_stream():
+    """以 NDJSON 逐行回傳譯文片段（{"delta": ...}），最後一行為完整結果或錯誤"""
+    data = await request.get_json()
+    text = data.get('text') if data else None
+    if not text or not text.strip():
+        return jsonify({
+            'success': False,
+            'error': 'text is required'
+        }), 400
+    source_lang = data.get('source_lang', 'auto')
+    target_lang = data.get('target_lang', 'en')
+    cache_key = translation_cache.make_key(text, source_lang, target_lang)
+    
+    async def generate():
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+        try:
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(translate_executor, translation_cache.get, cache_key)
+            if cached:
+                tokens = single_chunk(cached.text)
+            elif not translation_router.can_stream:
+                # 翻譯後端都不支援串流時，一次回傳完整譯文
+                translation = await translate_async(text, src=source_lang, dest=target_lang)
+                tokens = single_chunk(translation.text)
+            else:
+                # 相同請求共用一次上游串流
+                tokens = translate_flight.stream(
+                    cache_key, stream_translation, text, source_lang, target_lang, cache_key)
+            async for token in tokens:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(token)
+                yield json.dumps({'delta': token}, ensure_ascii=False) + '\n'
+        except asyncio.TimeoutError:
+            yield json.dumps({'success': False, 'error': 'translation timed out'}) + '\n'
+            return
+        except Exception as e:
+            yield json.dumps({'success': False, 'error': str(e)}, ensure_ascii=False) + '\n'
+            return
+        finished = time.perf_counter()
+        translate_stream_stats['streams'] += 1
+        translate_stream_stats['tokens'] += len(parts)
+        translate_stream_stats['time_to_first_token_ms'] += ((first_token or finished) - started) * 1000
+        translate_stream_stats['total_ms'] += (finished - started) * 1000
+        yield json.dumps({
+            'success': True,
+            'done': True,
+            'translated_text': ''.join(parts).strip(),
+            'source_lang': source_lang,
+            'target_lang': target_lang
+        }, ensure_ascii=False) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/translate/batch', methods=['POST'])
+async def translate_batch():
+    try:
+        data = await request.get_json()
+        texts = data.get('texts')
+        source_lang = data.get('source_lang', 'auto')
+        target_langs = data.get('target_langs') or [data.get('target_lang', 'en')]
+        if not isinstance(texts, list) or not isinstance(target_langs, list):
+            return jsonify({
+                'success': False,
+                'error': 'texts and target_langs must be lists'
+            }), 400
+        if not all(isinstance(lang, str) and lang for lang in target_langs) or not isinstance(source_lang, str):
+            return jsonify({
+                'success': False,
+                'error': 'source_lang and target_langs must be language code strings'
+            }), 400
+        if len(texts) * len(target_langs) > TRANSLATE_BATCH_MAX_ITEMS:
+            return jsonify({
+                'success': False,
+                'error': f'batch exceeds {TRANSLATE_BATCH_MAX_ITEMS} items'
+            }), 413
+        
+        # 批次內去除重複項目（與翻譯快取使用相同的鍵）
+        unique_items = {}
+        for text in texts:
+            if not isinstance(text, str):
+                continue
+            for target_lang in target_langs:
+                key = translation_cache.make_key(text, source_lang, target_lang)
+                unique_items.setdefault(key, (text, target_lang))
+        
+        batch_semaphore = asyncio.Semaphore(TRANSLATE_BATCH_CONCURRENCY)
+        
+        async def translate_item(text, target_lang):
+            async with batch_semaphore:
+                try:
+                    translation = await translate_async(
+                        text, src=source_lang, dest=target_lang, timeout=data.get('timeout'))
+                    return {
+                        'success': True,
+                        'translated_text': translation.text,
+                        'source_lang': translation.src,
+                        'target_lang': translation.dest
+                    }
+                except asyncio.TimeoutError:
+                    return {
+                        'success': False,
+                        'error': 'translation timed out'
+                    }
+                except Exception as e:
+                    return {
+                        'success': False,
+                        'error': str(e)
+                    }
+        
+        keys = list(unique_items)
+        outcomes = await asyncio.gather(*(translate_item(*unique_items[key]) for key in keys))
+        outcome_by_key = dict(zip(keys, outcomes))
+        
+        # 依輸入順序組合結果
+        results = []
+        for text in texts:
+            if not isinstance(text, str):
+                results.append({
+                    'text': text,
+                    'success': False,
+                    'error': 'text must be a string'
+                })
+                continue
+            results.append({
+                'text': text,
+                'success': True,
+                'translations': {
+                    target_lang: outcome_by_key[translation_cache.make_key(text, source_lang, target_lang)]
+                    for target_lang in target_langs
+                }
+            })
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'unique_count': len(keys)
+        })
     except Exception as e:
         return jsonify({
             'success': False,
@@ -58,20 +515,14 @@ async def speak():
         data = await request.get_json()
         text = data.get('text')
         lang = data.get('lang', 'en')
+        rate = data.get('rate', '+0%')
+        pitch = data.get('pitch', '+0Hz')
         
         # 獲取對應的語音
         voice = VOICE_OPTIONS.get(lang, VOICE_OPTIONS['en'])
         
-        # 生成唯一的文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"temp/audio_{timestamp}.mp3"
-        
-        # 確保temp目錄存在
-        os.makedirs('temp', exist_ok=True)
-        
-        # 生成語音
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(filename)
+        # 生成語音（相同文字與語音設定直接使用快取）
+        filename = await speech_file_for(text, voice, rate, pitch)
         
         # 返回音頻文件的URL
         return jsonify({
@@ -84,9 +535,347 @@ async def speak():
             'error': str(e)
         }), 500
 
+@app.route('/speak/stream')
+async def speak_stream():
+    text = request.args.get('text', '')
+    lang = request.args.get('lang', 'en')
+    rate = request.args.get('rate', '+0%')
+    pitch = request.args.get('pitch', '+0Hz')
+    if not text.strip():
+        return jsonify({
+            'success': False,
+            'error': 'text is required'
+        }), 400
+    
+    voice = VOICE_OPTIONS.get(lang, VOICE_OPTIONS['en'])
+    cache_key = tts_cache.make_key(text, voice, rate, pitch)
+    filename = tts_cache.get(cache_key)
+    if filename:
+        return await send_file(filename, mimetype='audio/mpeg')
+    
+    # 不設定 Content-Length，以分塊傳輸回應
+    return Response(
+        tts_flight.stream(cache_key, stream_synthesis, text, voice, rate, pitch, cache_key),
+        mimetype='audio/mpeg'
+    )
+
+@app.route('/transcribe', methods=['POST'])
+async def transcribe():
+    """接收 16 位元單聲道 PCM（可分塊傳輸），邊上傳邊辨識，以 NDJSON 回傳暫定與最終結果
+
+    查詢參數：lang、sample_rate（預設 16000）；可選 target_lang 接著翻譯、speak=1 再合成語音
+    """
+    lang = request.args.get('lang', 'en')
+    target_lang = request.args.get('target_lang')
+    speak_result = request.args.get('speak') in ('1', 'true')
+    try:
+        sample_rate = int(request.args.get('sample_rate', TRANSCRIBE_SAMPLE_RATE))
+    except ValueError:
+        sample_rate = 0
+    if not 8000 <= sample_rate <= 48000:
+        return jsonify({
+            'success': False,
+            'error': 'sample_rate must be between 8000 and 48000'
+        }), 400
+    if transcribe_stats['active'] >= TRANSCRIBE_MAX_PENDING:
+        transcribe_stats['rejected'] += 1
+        return jsonify({
+            'success': False,
+            'error': 'too many transcriptions in progress'
+        }), 503
+    
+    engine = pick_recognizer(speech_recognizers, lang)
+    loop = asyncio.get_running_loop()
+    body = request.body
+    frames = queue.Queue()
+    events = asyncio.Queue()
+    max_bytes = TRANSCRIBE_MAX_SECONDS * sample_rate * 2
+    
+    def on_partial(text):
+        loop.call_soon_threadsafe(events.put_nowait, {'partial': text})
+    
+    def recognize():
+        return engine.recognize_stream(iter(frames.get, None), lang, sample_rate, on_partial=on_partial)
+    
+    async def pump():
+        # 上傳資料一到就交給辨識執行緒，不等整段上傳完成
+        received = 0
+        pending = b''
+        try:
+            async for chunk in body:
+                chunk = chunk[:max_bytes - received]
+                received += len(chunk)
+                pending += chunk
+                usable = len(pending) - len(pending) % 2
+                if usable:
+                    frames.put(pending[:usable])
+                    pending = pending[usable:]
+                if received >= max_bytes:
+                    break
+        finally:
+            frames.put(None)
+            transcribe_stats['bytes'] += received
+    
+    def line(message):
+        return json.dumps(message, ensure_ascii=False) + '\n'
+    
+    released = False
+    
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            transcribe_stats['active'] -= 1
+    
+    async def generate():
+        upload = asyncio.ensure_future(pump())
+        recognition = loop.run_in_executor(transcribe_executor, recognize)
+        try:
+            while not recognition.done():
+                next_event = asyncio.ensure_future(events.get())
+                await asyncio.wait({next_event, recognition}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event.done():
+                    yield line(next_event.result())
+                else:
+                    next_event.cancel()
+            while not events.empty():
+                yield line(events.get_nowait())
+            text = recognition.result()
+            await upload
+        except Exception as e:
+            yield line({'success': False, 'error': str(e)})
+            return
+        finally:
+            # 用戶端中斷時結束上傳與辨識執行緒
+            upload.cancel()
+            frames.put(None)
+            release()
+        
+        yield line({'final': text, 'lang': lang})
+        try:
+            speak_text, speak_lang = text, lang
+            if text and target_lang:
+                translation = await translate_async(text, src=lang, dest=target_lang)
+                speak_text, speak_lang = translation.text, target_lang
+                yield line({
+                    'translated_text': translation.text,
+                    'source_lang': lang,
+                    'target_lang': target_lang
+                })
+            if speak_text and speak_result:
+                voice = VOICE_OPTIONS.get(speak_lang, VOICE_OPTIONS['en'])
+                filename = await speech_file_for(speak_text, voice)
+                yield line({'audio_url': f'/audio/{os.path.basename(filename)}'})
+        except asyncio.TimeoutError:
+            yield line({'success': False, 'error': 'translation timed out'})
+            return
+        except Exception as e:
+            yield line({'success': False, 'error': str(e)})
+            return
+        yield line({'success': True, 'done': True})
+    
+    # 在回傳回應前就保留名額（檢查與保留之間沒有 await），同時到達的請求不會一起通過上限檢查
+    transcribe_stats['requests'] += 1
+    transcribe_stats['active'] += 1
+    stream = generate()
+    # 用戶端在回應開始前就斷線時產生器不會執行，由回收時釋放名額
+    weakref.finalize(stream, release)
+    return Response(stream, mimetype='application/x-ndjson')
+
+@app.websocket('/ws')
+async def conversation():
+    """持久的對話通道：用戶端送出語句，伺服器依序推送翻譯文字與語音"""
+    send_lock = asyncio.Lock()
+    tasks = set()
+    
+    async def send_json(message):
+        async with send_lock:
+            await websocket.send(json.dumps(message))
+    
+    async def handle_utterance(message):
+        utterance_id = message.get('id')
+        text = message.get('text')
+        source_lang = message.get('source_lang', 'auto')
+        target_lang = message.get('target_lang', 'en')
+        try:
+            translation = await translate_async(text, src=source_lang, dest=target_lang)
+            await send_json({
+                'type': 'translation',
+                'id': utterance_id,
+                'translated_text': translation.text,
+                'source_lang': translation.src,
+                'target_lang': translation.dest
+            })
+            
+            if message.get('speak', True) and translation.text:
+                voice = VOICE_OPTIONS.get(target_lang, VOICE_OPTIONS['en'])
+                audio = await speech_bytes_for(translation.text, voice)
+                # 先送出標頭，緊接著送出二進位音訊
+                async with send_lock:
+                    await websocket.send(json.dumps({
+                        'type': 'audio',
+                        'id': utterance_id,
+                        'size': len(audio)
+                    }))
+                    await websocket.send(audio)
+        except asyncio.TimeoutError:
+            await send_json({
+                'type': 'error',
+                'id': utterance_id,
+                'error': 'translation timed out'
+            })
+        except Exception as e:
+            await send_json({
+                'type': 'error',
+                'id': utterance_id,
+                'error': str(e)
+            })
+    
+    conversation_stats['active_connections'] += 1
+    try:
+        while True:
+            raw = await websocket.receive()
+            try:
+                message = json.loads(raw)
+            except (TypeError, ValueError):
+                message = None
+            if not isinstance(message, dict):
+                await send_json({
+                    'type': 'error',
+                    'error': 'invalid message'
+                })
+                continue
+            
+            if message.get('type') == 'utterance':
+                conversation_stats['utterances'] += 1
+                task = asyncio.ensure_future(handle_utterance(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            elif message.get('type') == 'ping':
+                await send_json({'type': 'pong'})
+    finally:
+        conversation_stats['active_connections'] -= 1
+        for task in tasks:
+            task.cancel()
+
+def tts_stream_summary():
+    streams = tts_stream_stats['streams']
+    return {
+        'streams': streams,
+        'chunk_chars': TTS_CHUNK_CHARS,
+        'chunk_concurrency': TTS_CHUNK_CONCURRENCY,
+        'avg_chunks': tts_stream_stats['chunks'] / streams if streams else 0.0,
+        'avg_time_to_first_audio_ms': tts_stream_stats['time_to_first_audio_ms'] / streams if streams else 0.0,
+        'avg_total_synthesis_ms': tts_stream_stats['total_synthesis_ms'] / streams if streams else 0.0
+    }
+
+def translate_stream_summary():
+    streams = translate_stream_stats['streams']
+    return {
+        'enabled': translation_router.can_stream,
+        'streams': streams,
+        'avg_tokens': translate_stream_stats['tokens'] / streams if streams else 0.0,
+        'avg_time_to_first_token_ms': translate_stream_stats['time_to_first_token_ms'] / streams if streams else 0.0,
+        'avg_total_ms': translate_stream_stats['total_ms'] / streams if streams else 0.0,
+        'upstream': deepseek_api.stats() if deepseek_api else None
+    }
+
+@app.route('/stats')
+async def stats():
+    # 多工作程序模式下，統計為處理此請求的工作程序所有
+    return jsonify({
+        'pid': os.getpid(),
+        'tts_cache': tts_cache.stats(),
+        'audio_store': audio_store.stats(),
+        'translation_cache': translation_cache.stats(),
+        'translate_single_flight': translate_flight.stats(),
+        'tts_single_flight': tts_flight.stats(),
+        'conversation': conversation_stats,
+        'tts_stream': tts_stream_summary(),
+        'translate_stream': translate_stream_summary(),
+        'translate_router': translation_router.stats(),
+        'transcribe': dict(transcribe_stats, workers=TRANSCRIBE_WORKERS,
+                           engines={engine.name: engine.stats() for engine in speech_recognizers}),
+        'translate': dict(translate_stats, workers=TRANSLATE_WORKERS,
+                          concurrency=TRANSLATE_CONCURRENCY, timeout=TRANSLATE_TIMEOUT)
+    })
+
+def file_etag(path, stat):
+    """計算檔案內容雜湊作為 ETag（依修改時間與大小記憶）"""
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with audio_etags_lock:
+        etag = audio_etags.get(key)
+        if etag:
+            audio_etags.move_to_end(key)
+            return etag
+    # 雜湊計算不持有鎖
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(AUDIO_READ_CHUNK), b''):
+            digest.update(block)
+    etag = digest.hexdigest()[:32]
+    with audio_etags_lock:
+        audio_etags[key] = etag
+        while len(audio_etags) > 4096:
+            audio_etags.popitem(last=False)
+    return etag
+
+async def read_file_range(path, start, stop):
+    """在執行緒池中分塊讀取檔案的指定範圍，避免磁碟 I/O 阻塞事件迴圈"""
+    loop = asyncio.get_running_loop()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        offset = start
+        while offset < stop:
+            size = min(AUDIO_READ_CHUNK, stop - offset)
+            data = await loop.run_in_executor(None, os.pread, fd, size, offset)
+            if not data:
+                break
+            offset += len(data)
+            yield data
+    finally:
+        os.close(fd)
+
 @app.route('/audio/<filename>')
 async def serve_audio(filename):
-    return await send_from_directory('temp', filename)
+    path = safe_join(AUDIO_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    stat = os.stat(path)
+    loop = asyncio.get_running_loop()
+    etag = await loop.run_in_executor(None, file_etag, path, stat)
+    size = stat.st_size
+    
+    headers = {
+        'ETag': f'"{etag}"',
+        'Accept-Ranges': 'bytes'
+    }
+    # 以內容雜湊命名的語音檔內容不會改變
+    if filename.startswith(tts_cache.prefix):
+        headers['Cache-Control'] = f'public, max-age={AUDIO_CACHE_MAX_AGE}, immutable'
+    else:
+        headers['Cache-Control'] = 'no-cache'
+    
+    if request.if_none_match.contains(etag):
+        return Response('', status=304, headers=headers)
+    
+    start, stop, status = 0, size, 200
+    request_range = request.range
+    # If-Range 不符時忽略 Range，回傳完整檔案；未送出 Last-Modified，日期形式的 If-Range 一律視為不符
+    if request_range and ('If-Range' not in request.headers or request.if_range.etag == etag):
+        byte_range = request_range.range_for_length(size)
+        if byte_range:
+            start, stop = byte_range
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+        elif len(request_range.ranges) == 1:
+            headers['Content-Range'] = f'bytes */{size}'
+            return Response('', status=416, headers=headers)
+    
+    headers['Content-Length'] = str(stop - start)
+    return Response(read_file_range(path, start, stop), status=status,
+                    headers=headers, mimetype='audio/mpeg')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,67 @@
+import io
+import queue
+import threading
+import time
+
+import pygame
+
+
+class AudioPlayer:
+    """在獨立執行緒上播放記憶體中的 MP3 資料，播放結束時透過回呼通知"""
+
+    def __init__(self, poll_interval=0.02):
+        self.poll_interval = poll_interval
+        self._queue = queue.Queue()
+        self._interrupt = threading.Event()
+        self._busy = threading.Event()
+        self.played = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name='audio-player', daemon=True)
+        self._thread.start()
+
+    def play(self, data, on_finished=None, on_error=None):
+        """加入播放佇列（依序播放）"""
+        self._queue.put((data, on_finished, on_error))
+
+    def stop(self):
+        """停止目前播放並清空佇列"""
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._interrupt.set()
+
+    def is_busy(self):
+        return self._busy.is_set() or not self._queue.empty()
+
+    def shutdown(self):
+        self.stop()
+        self._queue.put(None)
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            data, on_finished, on_error = item
+            self._interrupt.clear()
+            self._busy.set()
+            try:
+                pygame.mixer.music.load(io.BytesIO(data), 'mp3')
+                pygame.mixer.music.play()
+                while pygame.mixer.music.get_busy() and not self._interrupt.is_set():
+                    time.sleep(self.poll_interval)
+                pygame.mixer.music.stop()
+                pygame.mixer.music.unload()
+            except Exception as e:
+                self.errors += 1
+                self._busy.clear()
+                if on_error:
+                    on_error(str(e))
+                continue
+            self.played += 1
+            self._busy.clear()
+            if on_finished:
+                on_finished()
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 預設容量上限 256 MB、保存 24 小時
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 24 * 3600
+# 未完成的暫存檔（.part）超過此時間視為殘留
+PARTIAL_MAX_AGE = 3600
+
+
+class AudioStore:
+    """音頻檔目錄的容量與保存期限管理，定期清除過期或超出容量的檔案"""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.gc_runs = 0
+        self.removed_files = 0
+        self.removed_bytes = 0
+        self.last_gc = None
+        self._files = 0
+        self._bytes = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_file():
+                continue
+            if not (entry.name.endswith('.mp3') or entry.name.endswith('.part')):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def gc(self):
+        """清除過期檔案，再由最舊的開始刪除直到低於容量上限，回傳刪除的檔案數"""
+        with self._gc_lock() as acquired:
+            if not acquired:
+                # 其他程序正在清理
+                return 0
+            now = time.time()
+            entries = sorted(self._scan())
+            keep = []
+            removed = []
+            for mtime, size, path in entries:
+                if path.endswith('.part'):
+                    # 未完成的檔案只依存在時間清除，不計入容量
+                    if now - mtime > PARTIAL_MAX_AGE:
+                        removed.append((size, path))
+                elif now - mtime > self.max_age:
+                    removed.append((size, path))
+                else:
+                    keep.append((size, path))
+
+            total = sum(size for size, _ in keep)
+            while keep and total > self.max_bytes:
+                size, path = keep.pop(0)
+                removed.append((size, path))
+                total -= size
+
+            removed_bytes = 0
+            removed_files = 0
+            for size, path in removed:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    print(f"刪除音頻檔失敗：{str(e)}")
+                    continue
+                removed_files += 1
+                removed_bytes += size
+
+            with self._lock:
+                self.gc_runs += 1
+                self.removed_files += removed_files
+                self.removed_bytes += removed_bytes
+                self.last_gc = now
+                self._files = len(keep)
+                self._bytes = total
+            return removed_files
+
+    def _gc_lock(self):
+        return _FileLock(os.path.join(self.root, '.gc.lock'))
+
+    async def run_gc(self, interval=300):
+        """定期在執行緒池中執行清理"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.gc)
+            except Exception as e:
+                print(f"音頻清理錯誤：{str(e)}")
+            await asyncio.sleep(interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files': self._files,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_age': self.max_age,
+                'usage_ratio': self._bytes / self.max_bytes if self.max_bytes else 0.0,
+                'gc_runs': self.gc_runs,
+                'removed_files': self.removed_files,
+                'removed_bytes': self.removed_bytes,
+                'last_gc': self.last_gc
+            }
+
+
+class _FileLock:
+    """非阻塞的跨程序檔案鎖；無法取得時 __enter__ 回傳 False"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return True
+        self._file = open(self.path, 'a')
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+        return True
+
+    def __exit__(self, *exc):
+        if self._file:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
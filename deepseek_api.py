@@ -0,0 +1,263 @@
+import asyncio
+import json
+import threading
+import time
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = "https://api.deepseek.com/v1"
+DEFAULT_MODEL = "deepseek-chat"
+# （連線逾時, 讀取逾時）秒數；串流時讀取逾時為兩個區塊之間的最長間隔
+DEFAULT_TIMEOUT = (5, 60)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 8
+# 只對暫時性錯誤重試
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _payload(model, messages, temperature, stream, extra):
+    data = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature
+    }
+    if stream:
+        data["stream"] = True
+    data.update(extra)
+    return data
+
+
+def _parse_sse_line(line):
+    """解析一行 SSE 資料，回傳事件內容（dict）、結束時回傳 None、非資料行回傳 False"""
+    if not line or not line.startswith('data:'):
+        return False
+    data = line[5:].strip()
+    if data == '[DONE]':
+        return None
+    return json.loads(data)
+
+
+def _delta_text(event):
+    choices = event.get('choices') or []
+    if not choices:
+        return ''
+    return (choices[0].get('delta') or {}).get('content') or ''
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.streams = 0
+        self.failures = 0
+        self._latency = 0.0
+        self._first_token = 0.0
+
+    def record(self, started, first_token=None, stream=False):
+        finished = time.perf_counter()
+        with self._lock:
+            self.requests += 1
+            self._latency += finished - started
+            if stream:
+                self.streams += 1
+                self._first_token += (first_token or finished) - started
+
+    def fail(self):
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'streams': self.streams,
+                'failures': self.failures,
+                'avg_latency_ms': self._latency * 1000 / self.requests if self.requests else 0.0,
+                'avg_first_token_ms': self._first_token * 1000 / self.streams if self.streams else 0.0
+            }
+
+
+class DeepseekAPI:
+    """Deepseek 對話 API 用戶端，共用連線池（keep-alive）並對暫時性錯誤自動重試"""
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 pool_size=DEFAULT_POOL_SIZE):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._stats = _Stats()
+
+    def _post(self, data, stream=False):
+        url = f"{self.base_url}/chat/completions"
+        try:
+            response = self.session.post(url, json=data, timeout=self.timeout, stream=stream)
+            response.raise_for_status()
+        except requests.RequestException:
+            self._stats.fail()
+            raise
+        return response
+
+    def create_chat_completion(self, messages, temperature=0.7, **kwargs):
+        """送出對話請求並回傳完整的回應 JSON"""
+        started = time.perf_counter()
+        response = self._post(_payload(self.model, messages, temperature, False, kwargs))
+        result = response.json()
+        self._stats.record(started)
+        return result
+
+    def stream_chat_completion(self, messages, temperature=0.7, **kwargs):
+        """以 SSE 串流送出對話請求，逐一產生收到的文字片段"""
+        started = time.perf_counter()
+        first_token = None
+        response = self._post(_payload(self.model, messages, temperature, True, kwargs), stream=True)
+        try:
+            # SSE 一律為 UTF-8；不依回應標頭的字元集解碼（text/event-stream 未標示時會被當成 ISO-8859-1）
+            for raw in response.iter_lines():
+                event = _parse_sse_line(raw.decode('utf-8').strip())
+                if event is None:
+                    break
+                if event is False:
+                    continue
+                text = _delta_text(event)
+                if text:
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    yield text
+        except requests.RequestException:
+            self._stats.fail()
+            raise
+        finally:
+            response.close()
+        self._stats.record(started, first_token, stream=True)
+
+    def close(self):
+        self.session.close()
+
+    def stats(self):
+        return self._stats.snapshot()
+
+
+class AsyncDeepseekAPI:
+    """DeepseekAPI 的 asyncio 版本，以單一 aiohttp 連線池處理所有請求"""
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 pool_size=DEFAULT_POOL_SIZE):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        self._session = None
+        self._stats = _Stats()
+
+    def _get_session(self):
+        # 延遲建立，確保連線池綁定在實際使用的事件迴圈上
+        if self._session is None or self._session.closed:
+            connect, read = self.timeout
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            )
+        return self._session
+
+    async def _post(self, data):
+        session = self._get_session()
+        url = f"{self.base_url}/chat/completions"
+        attempt = 0
+        while True:
+            try:
+                response = await session.post(url, json=data)
+                if response.status in RETRY_STATUSES and attempt < self.retries:
+                    retry_after = response.headers.get('Retry-After')
+                    response.release()
+                    raise _RetryableStatus(retry_after)
+                response.raise_for_status()
+                return response
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError, _RetryableStatus) as e:
+                if attempt >= self.retries:
+                    self._stats.fail()
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                if isinstance(e, _RetryableStatus) and e.retry_after:
+                    try:
+                        delay = max(delay, float(e.retry_after))
+                    except ValueError:
+                        pass
+                attempt += 1
+                await asyncio.sleep(delay)
+            except aiohttp.ClientError:
+                self._stats.fail()
+                raise
+
+    async def create_chat_completion(self, messages, temperature=0.7, **kwargs):
+        """送出對話請求並回傳完整的回應 JSON"""
+        started = time.perf_counter()
+        response = await self._post(_payload(self.model, messages, temperature, False, kwargs))
+        async with response:
+            result = await response.json(content_type=None)
+        self._stats.record(started)
+        return result
+
+    async def stream_chat_completion(self, messages, temperature=0.7, **kwargs):
+        """以 SSE 串流送出對話請求，逐一產生收到的文字片段"""
+        started = time.perf_counter()
+        first_token = None
+        response = await self._post(_payload(self.model, messages, temperature, True, kwargs))
+        async with response:
+            async for raw in response.content:
+                event = _parse_sse_line(raw.decode('utf-8').strip())
+                if event is None:
+                    break
+                if event is False:
+                    continue
+                text = _delta_text(event)
+                if text:
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    yield text
+        self._stats.record(started, first_token, stream=True)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self):
+        return self._stats.snapshot()
@@ -0,0 +1,64 @@
+from translation_cache import TranslationResult
+
+# 提示詞中使用的語言名稱
+LANGUAGE_NAMES = {
+    'zh-TW': 'Traditional Chinese (Taiwan)',
+    'zh-CN': 'Simplified Chinese',
+    'en': 'English',
+    'ja': 'Japanese',
+    'ko': 'Korean',
+    'fr': 'French',
+    'es': 'Spanish',
+    'th': 'Thai',
+    'vi': 'Vietnamese'
+}
+
+SYSTEM_PROMPT = (
+    "You are a translation engine. Translate the user's message {source} into {target}. "
+    "Reply with the translation only, without quotes, notes or explanations."
+)
+
+
+def build_messages(text, src, dest):
+    if src and src != 'auto':
+        source = f"from {LANGUAGE_NAMES.get(src, src)}"
+    else:
+        source = "from its original language"
+    target = LANGUAGE_NAMES.get(dest, dest)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT.format(source=source, target=target)},
+        {"role": "user", "content": text}
+    ]
+
+
+class DeepseekTranslator:
+    """以 DeepseekAPI 翻譯，介面與 googletrans.Translator 相容，另提供逐字串流"""
+
+    def __init__(self, api, temperature=0.3):
+        self.api = api
+        self.temperature = temperature
+
+    def translate(self, text, src='auto', dest='en'):
+        return TranslationResult(''.join(self.stream(text, src, dest)).strip(), src, dest)
+
+    def stream(self, text, src='auto', dest='en'):
+        """逐一產生翻譯文字片段"""
+        return self.api.stream_chat_completion(
+            build_messages(text, src, dest), temperature=self.temperature)
+
+
+class AsyncDeepseekTranslator:
+    """DeepseekTranslator 的 asyncio 版本，搭配 AsyncDeepseekAPI 使用"""
+
+    def __init__(self, api, temperature=0.3):
+        self.api = api
+        self.temperature = temperature
+
+    async def translate(self, text, src='auto', dest='en'):
+        parts = [token async for token in self.stream(text, src, dest)]
+        return TranslationResult(''.join(parts).strip(), src, dest)
+
+    def stream(self, text, src='auto', dest='en'):
+        """逐一產生翻譯文字片段（非同步產生器）"""
+        return self.api.stream_chat_completion(
+            build_messages(text, src, dest), temperature=self.temperature)
@@ -0,0 +1,187 @@
+import sys
+import time
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QColor
+
+# 預設保留的歷史記錄筆數（超過時丟棄最舊的記錄）
+DEFAULT_CAPACITY = 10000
+
+# 依翻譯方向顯示的顏色（共用同一組物件，不為每筆記錄建立）
+_FORWARD_FOREGROUND = QColor("#4CAF50")  # 綠色
+_FORWARD_BACKGROUND = QColor("#2d2d2d")
+_REVERSE_FOREGROUND = QColor("#2196F3")  # 藍色
+_REVERSE_BACKGROUND = QColor("#1e1e1e")
+
+
+class HistoryRecord:
+    __slots__ = ('timestamp', 'source_text', 'translated_text', 'source_lang', 'target_lang',
+                 'is_source_to_target', 'expanded')
+
+    def __init__(self, timestamp, source_text, translated_text, source_lang, target_lang, is_source_to_target):
+        self.timestamp = timestamp
+        self.source_text = source_text
+        self.translated_text = translated_text
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.is_source_to_target = is_source_to_target
+        self.expanded = False
+
+    def title(self):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.timestamp))
+        direction_indicator = "↑上方" if self.is_source_to_target else "↓下方"
+        return f"[{timestamp}] {direction_indicator}"
+
+    def display_text(self):
+        if not self.expanded:
+            return self.title()
+        return (
+            f"{self.title()}\n"
+            f"{self.source_lang}: {self.source_text}\n"
+            f"{self.target_lang}: {self.translated_text}"
+        )
+
+    def to_dict(self):
+        return {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.timestamp)),
+            'source_text': self.source_text,
+            'translated_text': self.translated_text,
+            'source_lang': self.source_lang,
+            'target_lang': self.target_lang,
+            'is_source_to_target': self.is_source_to_target
+        }
+
+
+class HistoryStore:
+    """固定容量的環形緩衝區，以（原文, 譯文）雜湊索引去除重複；新增、查詢與依列號存取皆為 O(1)
+
+    第 0 列為最新的記錄
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError('history capacity must be at least 1')
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._head = 0  # 下一筆寫入的位置
+        self._count = 0
+        self._index = {}  # (原文, 譯文) -> HistoryRecord
+        self.evicted = 0
+        self.duplicates = 0
+
+    def __len__(self):
+        return self._count
+
+    def contains(self, source_text, translated_text):
+        return (source_text, translated_text) in self._index
+
+    def is_full(self):
+        return self._count == self.capacity
+
+    def add(self, record):
+        """加入記錄並回傳被擠出的最舊記錄（沒有則為 None）；重複記錄不加入並回傳 False"""
+        key = (record.source_text, record.translated_text)
+        if key in self._index:
+            self.duplicates += 1
+            return False
+        evicted = self.pop_oldest() if self._count == self.capacity else None
+        self._slots[self._head] = record
+        self._head = (self._head + 1) % self.capacity
+        self._count += 1
+        self._index[key] = record
+        return evicted
+
+    def pop_oldest(self):
+        """移除並回傳最舊的記錄（最後一列）"""
+        if not self._count:
+            return None
+        slot = (self._head - self._count) % self.capacity
+        record = self._slots[slot]
+        self._slots[slot] = None
+        self._count -= 1
+        key = (record.source_text, record.translated_text)
+        if self._index.get(key) is record:
+            del self._index[key]
+        self.evicted += 1
+        return record
+
+    def record(self, row):
+        if not 0 <= row < self._count:
+            raise IndexError(row)
+        return self._slots[(self._head - 1 - row) % self.capacity]
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+        self._head = 0
+        self._count = 0
+        self._index.clear()
+
+    def stats(self):
+        return {
+            'entries': self._count,
+            'capacity': self.capacity,
+            'evicted': self.evicted,
+            'duplicates': self.duplicates
+        }
+
+
+class HistoryModel(QAbstractListModel):
+    """歷史記錄的清單模型，只在檢視需要顯示某一列時才產生該列的文字"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.store = HistoryStore(capacity)
+        self.expanded_count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.store):
+            return None
+        record = self.store.record(index.row())
+        if role == Qt.DisplayRole:
+            return record.display_text()
+        if role == Qt.ForegroundRole:
+            return _FORWARD_FOREGROUND if record.is_source_to_target else _REVERSE_FOREGROUND
+        if role == Qt.BackgroundRole:
+            return _FORWARD_BACKGROUND if record.is_source_to_target else _REVERSE_BACKGROUND
+        if role == Qt.UserRole:
+            return record.to_dict()
+        return None
+
+    def add(self, source_text, translated_text, source_lang, target_lang, is_source_to_target):
+        """在最上方加入一筆記錄，重複的（原文, 譯文）不加入；回傳是否已加入"""
+        if self.store.contains(source_text, translated_text):
+            self.store.duplicates += 1
+            return False
+        record = HistoryRecord(
+            time.time(), source_text, translated_text,
+            sys.intern(source_lang), sys.intern(target_lang), is_source_to_target
+        )
+        if self.store.is_full():
+            # 先移除最後一列（最舊的記錄）
+            last = len(self.store) - 1
+            self.beginRemoveRows(QModelIndex(), last, last)
+            if self.store.pop_oldest().expanded:
+                self.expanded_count -= 1
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.store.add(record)
+        self.endInsertRows()
+        return True
+
+    def toggle_expanded(self, row):
+        """切換某一列的展開/折疊狀態"""
+        record = self.store.record(row)
+        record.expanded = not record.expanded
+        self.expanded_count += 1 if record.expanded else -1
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+        return record.expanded
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self.expanded_count = 0
+        self.endResetModel()
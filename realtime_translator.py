@@ -1,20 +1,30 @@
 import sys
 import os
-import asyncio
 import pygame
 import speech_recognition as sr
 import threading
 import time
+from collections import deque
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QTextEdit, QComboBox, QPushButton, QLabel,
                             QFrame, QCheckBox, QMessageBox, QDialog, QSlider, QStackedLayout,
-                            QListWidget, QListWidgetItem)
-from PySide6.QtCore import Qt, QThread, Signal, QTimer, QMetaObject, Q_ARG, Slot, QDateTime
-from PySide6.QtGui import QPalette, QColor, QFont, QIcon, QPainter, QPainterPath
-import requests
+                            QListView)
+from PySide6.QtCore import (Qt, QThread, Signal, QTimer, QMetaObject, Q_ARG, Slot,
+                            QObject, QRunnable, QThreadPool)
+from PySide6.QtGui import QPalette, QFont, QIcon, QPainter, QPainterPath
 from dotenv import load_dotenv
-import edge_tts
-from googletrans import Translator
+from tts_cache import TTSCache
+from translation_cache import TranslationCache, CachedTranslator
+from segmenter import SegmentTranslator, chunk_text
+from audio_player import AudioPlayer
+from audio_store import AudioStore
+from tts_worker import TTSWorker, format_rate, format_pitch
+from deepseek_api import DeepseekAPI, DEFAULT_BASE_URL as DEEPSEEK_BASE_URL
+from translation_backends import BackendRouter, create_backends
+from reverse_translator import ReverseTranslator
+from voice_capture import VoiceCapture, START_TIMEOUT
+from speech_recognizers import GoogleRecognizer, VoskRecognizer, pick_recognizer
+from history_model import HistoryModel, DEFAULT_CAPACITY
 
 # Load environment variables
 load_dotenv()
@@ -174,95 +184,228 @@ class VoiceSettingsDialog(QDialog):
             'pitch': self.pitch_slider.value()
         }
 
-class AsyncTTSThread(QThread):
-    finished = Signal()
-    error = Signal(str)
+class UtteranceGroup:
+    """同一段翻譯切出的語句，用來統計首段出聲時間與總合成時間"""
+    __slots__ = ('started', 'remaining', 'first_audio')
 
-    def __init__(self, text, voice, speed, pitch, output_file):
-        super().__init__()
+    def __init__(self, count):
+        self.started = time.perf_counter()
+        self.remaining = count
+        self.first_audio = None
+
+class Utterance:
+    __slots__ = ('job_id', 'text', 'voice', 'speed', 'pitch', 'cache_key', 'audio', 'started',
+                 'failed', 'group')
+
+    def __init__(self, job_id, text, voice, speed, pitch, cache_key, group):
+        self.job_id = job_id
         self.text = text
         self.voice = voice
         self.speed = speed
         self.pitch = pitch
-        self.output_file = output_file
-        self._is_finished = False  # 添加標記
+        self.cache_key = cache_key
+        self.audio = None
+        self.started = False
+        self.failed = False
+        self.group = group
 
-    def run(self):
+class UtteranceQueue(QObject):
+    """依序播放的語句佇列：播放第 N 句的同時預先合成後面的語句"""
+    depth_changed = Signal(int)
+    error = Signal(str)
+    _playback_done = Signal()
+    _synthesis_done = Signal(int, object, str)  # 工作編號, 音訊資料, 錯誤訊息
+
+    def __init__(self, player, cache, worker, prefetch=2, chunk_chars=120, parent=None):
+        super().__init__(parent)
+        self.player = player
+        self.cache = cache
+        self.worker = worker
+        self.prefetch = max(1, prefetch)
+        self.chunk_chars = chunk_chars
+        self.groups = 0
+        self.chunks = 0
+        self._time_to_first_audio = 0.0
+        self._total_synthesis = 0.0
+        self._items = deque()
+        self._jobs = {}  # job_id -> Utterance
+        self._next_job_id = 1
+        self._playing = False
+        self._playback_done.connect(self._on_playback_done)
+        self._synthesis_done.connect(self._on_synthesis_done)
+
+    def enqueue(self, text, voice, speed=100, pitch=0):
+        """加入待朗讀的文字，長文依句子切段後並行合成、依序播放"""
+        chunks = chunk_text(text, self.chunk_chars) or [text]
+        group = UtteranceGroup(len(chunks))
+        self.groups += 1
+        self.chunks += len(chunks)
+        for chunk in chunks:
+            cache_key = self.cache.make_key(chunk, voice, format_rate(speed), format_pitch(pitch))
+            item = Utterance(self._next_job_id, chunk, voice, speed, pitch, cache_key, group)
+            self._next_job_id += 1
+            item.audio = self.cache.get_bytes(cache_key)
+            if item.audio:
+                self._chunk_synthesized(group)
+            self._items.append(item)
+        self._pump()
+
+    def _chunk_synthesized(self, group):
+        group.remaining -= 1
+        if group.remaining == 0:
+            self._total_synthesis += time.perf_counter() - group.started
+
+    def stats(self):
+        groups = self.groups
+        return {
+            'depth': self.depth(),
+            'groups': groups,
+            'chunks': self.chunks,
+            'chunk_chars': self.chunk_chars,
+            'prefetch': self.prefetch,
+            'avg_time_to_first_audio_ms': self._time_to_first_audio * 1000 / groups if groups else 0.0,
+            'avg_total_synthesis_ms': self._total_synthesis * 1000 / groups if groups else 0.0
+        }
+
+    def depth(self):
+        """尚未播放完畢的語句數（含正在播放的一句）"""
+        return len(self._items) + (1 if self._playing else 0)
+
+    def clear(self):
+        """清空佇列並停止目前播放"""
+        self._items.clear()
+        self._jobs.clear()
+        self.player.stop()
+        self.depth_changed.emit(self.depth())
+
+    def _pump(self):
+        # 開頭的語句已合成完成且目前沒有播放時，立即播放
+        while not self._playing and self._items:
+            head = self._items[0]
+            if head.failed:
+                self._items.popleft()
+                continue
+            if head.audio is None:
+                break
+            self._items.popleft()
+            if head.group.first_audio is None:
+                head.group.first_audio = time.perf_counter()
+                self._time_to_first_audio += head.group.first_audio - head.group.started
+            self._playing = True
+            self.player.play(
+                head.audio,
+                on_finished=self._playback_done.emit,
+                on_error=self._on_player_error
+            )
+
+        # 預先合成接下來的語句
+        for item in list(self._items)[:self.prefetch]:
+            if item.audio is None and not item.started and not item.failed:
+                item.started = True
+                self._jobs[item.job_id] = item
+                future = self.worker.submit(
+                    item.text, item.voice, format_rate(item.speed), format_pitch(item.pitch))
+                future.add_done_callback(
+                    lambda f, job_id=item.job_id, cache_key=item.cache_key:
+                        self._on_future_done(job_id, cache_key, f))
+
+        self.depth_changed.emit(self.depth())
+
+    def _on_player_error(self, error):
+        # 在播放執行緒上呼叫，透過信號回到主執行緒
+        self.error.emit(f"播放音頻失敗：{error}")
+        self._playback_done.emit()
+
+    @Slot()
+    def _on_playback_done(self):
+        self._playing = False
+        self._pump()
+
+    def _on_future_done(self, job_id, cache_key, future):
+        # 在合成工作者執行緒上呼叫：寫入快取後透過信號回到主執行緒
         try:
-            # 確保輸出目錄存在
-            os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
-            
-            # 執行語音合成
-            asyncio.run(self._synthesize())
-            
-            # 等待文件完全寫入
-            max_retries = 10
-            retry_count = 0
-            while not os.path.exists(self.output_file) and retry_count < max_retries:
-                time.sleep(0.2)
-                retry_count += 1
-            
-            if os.path.exists(self.output_file):
-                self._is_finished = True
-                self.finished.emit()
-            else:
-                self.error.emit("無法創建音頻文件")
-                
+            audio = future.result()
         except Exception as e:
-            self.error.emit(str(e))
+            self._synthesis_done.emit(job_id, None, str(e) or type(e).__name__)
+            return
+        if not audio:
+            self._synthesis_done.emit(job_id, None, "無法產生語音")
+            return
+        self.cache.put_bytes(cache_key, audio)
+        self._synthesis_done.emit(job_id, audio, "")
 
-    async def _synthesize(self):
-        rate = f"{'+' if self.speed >= 100 else ''}{self.speed - 100}%"
-        pitch = f"{'+' if self.pitch >= 0 else ''}{self.pitch}Hz"
-        
-        communicate = edge_tts.Communicate(
-            self.text,
-            self.voice,
-            rate=rate,
-            pitch=pitch
-        )
-        await communicate.save(self.output_file)
-
-    def is_finished(self):
-        return self._is_finished
-
-class DeepseekAPI:
-    def __init__(self, api_key):
-        self.api_key = api_key
-        self.base_url = "https://api.deepseek.com/v1"
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+    @Slot(int, object, str)
+    def _on_synthesis_done(self, job_id, audio, error):
+        item = self._jobs.pop(job_id, None)
+        if not item:
+            return
+        self._chunk_synthesized(item.group)
+        if error:
+            item.failed = True
+            self.error.emit(f"語音合成錯誤：{error}")
+        else:
+            item.audio = audio
+        self._pump()
 
-    def create_chat_completion(self, messages, temperature=0.7):
-        url = f"{self.base_url}/chat/completions"
-        data = {
-            "model": "deepseek-chat",
-            "messages": messages,
-            "temperature": temperature
-        }
-        
-        response = requests.post(url, headers=self.headers, json=data)
-        response.raise_for_status()  # 
-        return response.json()
+class TranslationJobSignals(QObject):
+    finished = Signal(int, object, object)  # 工作編號, 內容, 結果
+    error = Signal(int, object, str)
+    partial = Signal(int, str)  # 工作編號, 目前的部分譯文
+
+class TranslationJob(QRunnable):
+    """在執行緒池中執行的翻譯工作，結果透過信號送回主執行緒"""
+
+    def __init__(self, job_id, func, args=(), context=None, streaming=False):
+        super().__init__()
+        self.job_id = job_id
+        self.func = func
+        self.args = args
+        self.context = context
+        self.streaming = streaming
+        self.signals = TranslationJobSignals()
+
+    def _emit_partial(self, text):
+        self.signals.partial.emit(self.job_id, text)
+
+    def run(self):
+        try:
+            if self.streaming:
+                result = self.func(*self.args, on_partial=self._emit_partial)
+            else:
+                result = self.func(*self.args)
+        except Exception as e:
+            self.signals.error.emit(self.job_id, self.context, str(e))
+            return
+        self.signals.finished.emit(self.job_id, self.context, result)
 
 class SpeechRecognitionThread(QThread):
     finished = Signal(str)
     
-    def __init__(self, language):
+    partial = Signal(str)
+    
+    def __init__(self, language, capture=None, engine=None):
         super().__init__()
         self.language = language
+        self.capture = capture
+        self.engine = engine
         
     def run(self):
-        recognizer = sr.Recognizer()
-        with sr.Microphone() as source:
-            recognizer.adjust_for_ambient_noise(source)
-            audio = recognizer.listen(source)
-            
+        engine = self.engine or GoogleRecognizer()
         try:
-            text = recognizer.recognize_google(audio, language=self.language)
+            if self.capture is not None and self.capture.running:
+                # 使用常駐擷取，不需重新開啟裝置與校正，支援串流的後端會邊說邊回報暫定結果
+                text = engine.recognize_stream(
+                    self.capture.stream(), self.language, self.capture.sample_rate,
+                    self.capture.sample_width, on_partial=self.partial.emit)
+            else:
+                recognizer = sr.Recognizer()
+                with sr.Microphone() as source:
+                    recognizer.adjust_for_ambient_noise(source)
+                    audio = recognizer.listen(source)
+                text = engine.recognize(audio, self.language)
             self.finished.emit(text)
+        except sr.WaitTimeoutError:
+            self.finished.emit("")
         except sr.UnknownValueError:
             self.finished.emit("")
         except sr.RequestError as e:
@@ -318,6 +461,7 @@ class RecordButton(QPushButton):
 class TranslatorApp(QMainWindow):
     update_ui_signal = Signal(str, QTextEdit, bool)
     update_status_signal = Signal(str)
+    partial_speech_signal = Signal(str, QTextEdit)  # 串流辨識的暫定結果
     
     def __init__(self):
         super().__init__()
@@ -349,9 +493,43 @@ class TranslatorApp(QMainWindow):
         
         # 
         pygame.mixer.init()
+        self.audio_player = AudioPlayer()
         
         # 
-        self.translator = Translator()
+        temp_dir = os.path.join(os.path.dirname(__file__), "temp")
+        self.translation_cache = TranslationCache(os.path.join(temp_dir, "translation_cache.db"))
+        
+        # 翻譯後端（TRANSLATE_BACKENDS 依偏好順序列出），由路由器依延遲選擇並對慢回應送出對沖請求；
+        # 設定 DEEPSEEK_API_KEY 時優先使用 Deepseek，上方輸入的譯文逐字串流顯示
+        deepseek_key = os.environ.get('DEEPSEEK_API_KEY')
+        if deepseek_key:
+            self.deepseek_api = DeepseekAPI(
+                deepseek_key,
+                base_url=os.environ.get('DEEPSEEK_BASE_URL', DEEPSEEK_BASE_URL)
+            )
+        else:
+            self.deepseek_api = None
+        hedge_ms = os.environ.get('TRANSLATE_HEDGE_MS')
+        self.translation_router = BackendRouter(
+            create_backends(os.environ.get('TRANSLATE_BACKENDS'), self.deepseek_api),
+            hedge_after=float(hedge_ms) / 1000 if hedge_ms else None
+        )
+        self.translator = CachedTranslator(self.translation_router, self.translation_cache)
+        
+        # 逐句翻譯表（只翻譯新增或修改過的句子）
+        self.segment_translator = SegmentTranslator(self.translator)
+        
+        # 反向翻譯（修正與翻譯同時進行，或依快取與本機判斷略過修正）
+        self.reverse_translator = ReverseTranslator(self.translator, self.translation_cache)
+        
+        # 語音快取（與網頁版共用 temp 目錄）
+        self.tts_cache = TTSCache(temp_dir)
+        
+        # 啟動時在背景清除過期或殘留的音頻檔
+        self.audio_store = AudioStore(temp_dir)
+        threading.Thread(target=self.audio_store.gc, name='audio-gc', daemon=True).start()
+        # 同時清除翻譯快取中已過期的記錄
+        threading.Thread(target=self.translation_cache.purge_expired, name='translation-purge', daemon=True).start()
         
         # 
         self.is_muted = False
@@ -361,7 +539,55 @@ class TranslatorApp(QMainWindow):
         
         # 
         self.speech_thread = None
-        self.tts_thread = None
+        
+        # 常駐麥克風擷取：裝置只開啟與校正一次，按下錄音鍵即可開始收音
+        self.recognizer = sr.Recognizer()
+        self.voice_capture = VoiceCapture()
+        self.voice_capture.start(wait=False)
+        
+        # 語音辨識後端：設定 VOSK_MODEL_DIR 時優先使用本機串流辨識，沒有該語言模型時改用 Google
+        self.speech_recognizers = [GoogleRecognizer(self.recognizer)]
+        if os.environ.get('VOSK_MODEL_DIR'):
+            self.speech_recognizers.insert(0, VoskRecognizer(
+                os.environ['VOSK_MODEL_DIR'], sample_rate=self.voice_capture.sample_rate))
+        self._partial_text_widget = None
+        
+        # 語句朗讀佇列（播放目前語句時預先合成後續語句）
+        self.tts_worker = TTSWorker(concurrency=int(os.environ.get('TTS_CONCURRENCY', 3)))
+        self.utterance_queue = UtteranceQueue(
+            self.audio_player,
+            self.tts_cache,
+            self.tts_worker,
+            prefetch=int(os.environ.get('TTS_PREFETCH', 2)),
+            chunk_chars=int(os.environ.get('TTS_CHUNK_CHARS', 120)),
+            parent=self
+        )
+        self.utterance_queue.error.connect(self.update_status_signal.emit)
+        
+        # 自動翻譯的延遲計時器（每次輸入都重新計時，只在停止輸入後翻譯一次）
+        self.translate_debounce_ms = int(os.environ.get('TRANSLATE_DEBOUNCE_MS', 1000))
+        self.translate_timer = QTimer(self)
+        self.translate_timer.setSingleShot(True)
+        self.translate_timer.timeout.connect(self.translate_text)
+        self.debounce_skipped = 0
+        
+        # 翻譯世代編號，用來丟棄已被較新請求取代的結果
+        self.translate_generation = 0
+        self.reverse_generation = 0
+        self.stale_results_dropped = 0
+        
+        # 正向與反向翻譯從送出到結果回到主執行緒的時間，用於比較兩條路徑的延遲
+        self.path_timings = {
+            'forward': {'count': 0, 'total_ms': 0.0},
+            'reverse': {'count': 0, 'total_ms': 0.0}
+        }
+        
+        # 翻譯工作執行緒池（網路呼叫不在 GUI 執行緒上執行）
+        self.translation_pool = QThreadPool(self)
+        self.translation_pool.setMaxThreadCount(int(os.environ.get('TRANSLATE_WORKERS', 4)))
+        
+        # 歷史記錄（固定容量，超過時丟棄最舊的記錄）
+        self.history_model = HistoryModel(int(os.environ.get('HISTORY_LIMIT', DEFAULT_CAPACITY)), self)
         
         # 
         self.setup_ui()
@@ -378,6 +604,7 @@ class TranslatorApp(QMainWindow):
         
         # 連接信號
         self.update_ui_signal.connect(self.update_ui_slot)
+        self.partial_speech_signal.connect(self.partial_speech_slot)
         self.update_status_signal.connect(self.statusBar().showMessage)
         
         # 設置說明文字
@@ -448,7 +675,7 @@ class TranslatorApp(QMainWindow):
                 color: #ffffff;
                 font-size: 14px;
             }
-            QListWidget {
+            QListView {
                 background-color: #2d2d2d;
                 color: #ffffff;
                 border: 1px solid #3d3d3d;
@@ -456,11 +683,11 @@ class TranslatorApp(QMainWindow):
                 padding: 5px;
                 font-size: 14px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px;
                 border-bottom: 1px solid #3d3d3d;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #0078d4;
             }
         """)
@@ -603,9 +830,12 @@ class TranslatorApp(QMainWindow):
         history_layout.addLayout(history_header)
 
         # 歷史記錄列表
-        self.history_list = QListWidget()
+        # 只有可見的列才會向模型取資料；沒有展開的記錄時各列等高，捲動不需逐列量測高度
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
+        self.history_list.setUniformItemSizes(True)
         self.history_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #2d2d2d;
                 color: #ffffff;
                 border: 1px solid #3d3d3d;
@@ -613,18 +843,18 @@ class TranslatorApp(QMainWindow):
                 padding: 5px;
                 font-size: 14px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px;
                 border-bottom: 1px solid #3d3d3d;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #0078d4;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #3d3d3d;
             }
         """)
-        self.history_list.itemClicked.connect(self.toggle_history_item)
+        self.history_list.clicked.connect(self.toggle_history_item)
         history_layout.addWidget(self.history_list)
 
         # 創建一個用於顯示/隱藏歷史記錄的浮動按鈕
@@ -685,24 +915,32 @@ class TranslatorApp(QMainWindow):
     def _record_voice(self, language, text_widget, button, is_target=False):
         """錄音並進行語音識別"""
         try:
-            recognizer = sr.Recognizer()
+            engine = pick_recognizer(self.speech_recognizers, language)
             
-            with sr.Microphone() as source:
-                self.update_status_signal.emit("正在調整環境噪音...")
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
+            # 程式剛啟動時常駐擷取可能仍在開啟裝置，先等它完成，避免同時開啟第二個麥克風
+            self.voice_capture.start(timeout=START_TIMEOUT)
+            if self.voice_capture.running:
                 self.update_status_signal.emit("請說話...")
-                audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
+                result = self._recognize_stream(engine, language, text_widget, button)
+            elif self.voice_capture.starting:
+                self.update_status_signal.emit("麥克風尚未就緒，請稍後再試")
+                button.setRecording(False)
+                return
+            else:
+                # 無法常駐開啟麥克風時，沿用每次開啟並校正的方式
+                with sr.Microphone() as source:
+                    self.update_status_signal.emit("正在調整環境噪音...")
+                    self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                    
+                    self.update_status_signal.emit("請說話...")
+                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
                 
-            # 停止錄音
-            button.setRecording(False)
-            
-            self.update_status_signal.emit("正在識別語音...")
-            
-            if language == "zh-TW":
-                language = "zh-TW"
+                # 停止錄音
+                button.setRecording(False)
+                
+                self.update_status_signal.emit("正在識別語音...")
+                result = engine.recognize(audio, language)
             
-            result = recognizer.recognize_google(audio, language=language)
             print(f"識別結果: {result}")
             
             if result:
@@ -728,10 +966,57 @@ class TranslatorApp(QMainWindow):
             self.update_status_signal.emit(f"發生錯誤：{str(e)}")
             button.setRecording(False)
 
+    def _recognize_stream(self, engine, language, text_widget, button):
+        """邊錄音邊辨識，暫定結果即時顯示；本機辨識失敗時以同一段錄音改用 Google"""
+        captured = []
+        
+        def frames():
+            for frame in self.voice_capture.stream(timeout=5, phrase_time_limit=10):
+                captured.append(frame)
+                yield frame
+            # 停止錄音
+            button.setRecording(False)
+            if not engine.streaming:
+                self.update_status_signal.emit("正在識別語音...")
+        
+        def on_partial(text):
+            self.partial_speech_signal.emit(text, text_widget)
+        
+        stream = frames()
+        try:
+            return engine.recognize_stream(
+                stream, language, self.voice_capture.sample_rate,
+                self.voice_capture.sample_width, on_partial=on_partial)
+        except (sr.WaitTimeoutError, sr.RequestError):
+            raise
+        except Exception as e:
+            fallback = self.speech_recognizers[-1]
+            if fallback is engine:
+                raise
+            print(f"本機語音辨識錯誤，改用 {fallback.name}：{str(e)}")
+            # 收完這句剩下的音框，再以整段錄音辨識
+            for _ in stream:
+                pass
+            if not captured:
+                raise
+            audio = sr.AudioData(b''.join(captured), self.voice_capture.sample_rate,
+                                 self.voice_capture.sample_width)
+            return fallback.recognize(audio, language)
+
+    @Slot(str, QTextEdit)
+    def partial_speech_slot(self, text, text_widget):
+        """顯示串流辨識的暫定結果（不觸發翻譯）"""
+        text_widget.blockSignals(True)
+        text_widget.setText(text)
+        text_widget.blockSignals(False)
+        self._partial_text_widget = text_widget
+
     @Slot(str, QTextEdit, bool)
     def update_ui_slot(self, result, text_widget, is_target):
         """在主執行緒中更新 UI"""
-        if text_widget.toPlainText() != result:
+        showing_partial = self._partial_text_widget is text_widget
+        self._partial_text_widget = None
+        if text_widget.toPlainText() != result or showing_partial:
             text_widget.setText(result)
             
             # 只在語音輸入時設置標記
@@ -743,6 +1028,10 @@ class TranslatorApp(QMainWindow):
 
     def translate_text(self):
         """執行翻譯（上方輸入）"""
+        self.translate_timer.stop()
+        self.translate_generation += 1
+        generation = self.translate_generation
+        
         source_text = self.source_text.toPlainText()
         if not source_text:
             self.translation_text.clear()
@@ -751,34 +1040,63 @@ class TranslatorApp(QMainWindow):
         source_lang = self.get_language_code(self.source_lang.currentText())
         target_lang = self.get_language_code(self.target_lang.currentText())
         
-        try:
-            self.update_status_signal.emit("正在翻譯...")
-            
-            last_line = source_text.strip().split('\n')[-1]
-            translation = self.translator.translate(
-                last_line,
-                src=source_lang,
-                dest=target_lang
-            )
-            
-            if translation and translation.text:
-                current_text = self.translation_text.toPlainText()
-                if current_text != translation.text:
-                    self.translation_text.setText(translation.text)
-                    self.update_status_signal.emit("翻譯完成")
-                    
-                    # 添加到歷史記錄
-                    self.add_to_history(last_line, translation.text)
-                    
-                    # 朗讀翻譯結果（對方的語言）
-                    if not self.is_muted:
-                        self.speak_translation(translation.text, target_lang)
-            else:
-                self.update_status_signal.emit("翻譯失敗")
-            
-        except Exception as e:
-            print(f"翻譯錯誤：{str(e)}")
-            self.update_status_signal.emit(f"翻譯錯誤：{str(e)}")
+        self.update_status_signal.emit("正在翻譯...")
+        
+        job = TranslationJob(
+            generation,
+            self.segment_translator.translate,
+            (source_text, source_lang, target_lang),
+            context={'target_lang': target_lang, 'started': time.perf_counter()},
+            streaming=self.translation_router.can_stream
+        )
+        job.signals.partial.connect(self._on_translation_partial)
+        job.signals.finished.connect(self._on_translation_finished)
+        job.signals.error.connect(self._on_translation_error)
+        self.translation_pool.start(job)
+
+    @Slot(int, str)
+    def _on_translation_partial(self, generation, text):
+        """串流翻譯時即時顯示目前收到的部分譯文"""
+        if generation != self.translate_generation:
+            return
+        self.translation_text.setText(text)
+
+    @Slot(int, object, object)
+    def _on_translation_finished(self, generation, context, result):
+        """在主執行緒中套用翻譯結果"""
+        # 已有較新的翻譯請求，丟棄此結果
+        if generation != self.translate_generation:
+            self.stale_results_dropped += 1
+            return
+        
+        self._record_path_timing('forward', context)
+        translated_text, new_segments = result
+        target_lang = context['target_lang']
+        if translated_text:
+            current_text = self.translation_text.toPlainText()
+            # 串流時譯文已逐步顯示，仍需處理本次新翻譯的句子
+            if current_text != translated_text or new_segments:
+                self.translation_text.setText(translated_text)
+                self.update_status_signal.emit("翻譯完成")
+                
+                # 只將新翻譯的句子加入歷史記錄並朗讀
+                for segment, segment_translation in new_segments:
+                    self.add_to_history(segment, segment_translation)
+                
+                # 朗讀翻譯結果（對方的語言）
+                new_text = " ".join(t for _, t in new_segments if t)
+                if new_text and not self.is_muted:
+                    self.speak_translation(new_text, target_lang)
+        else:
+            self.update_status_signal.emit("翻譯失敗")
+
+    @Slot(int, object, str)
+    def _on_translation_error(self, generation, context, error):
+        if generation != self.translate_generation:
+            self.stale_results_dropped += 1
+            return
+        print(f"翻譯錯誤：{error}")
+        self.update_status_signal.emit(f"翻譯錯誤：{error}")
 
     def speak_translation(self, text, lang_code):
         """播放翻譯結果的語音"""
@@ -786,61 +1104,18 @@ class TranslatorApp(QMainWindow):
             return
         
         try:
-            # 確保前一個語音合成執行緒已完成
-            if hasattr(self, 'tts_thread') and self.tts_thread and not self.tts_thread.is_finished():
-                return
-            
             voice = self.get_voice_for_language(lang_code)
             if not voice:
                 print(f"找不到語音：{lang_code}")
                 return
-                
-            # 創建臨時目錄（如果不存在）
-            temp_dir = os.path.join(os.path.dirname(__file__), "temp")
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            # 設置臨時音頻文件路徑
-            audio_file = os.path.join(temp_dir, f"temp_audio_{int(time.time()*1000)}.mp3")
             
-            # 建立 AsyncTTSThread
-            self.tts_thread = AsyncTTSThread(text, voice, 100, 0, audio_file)
-            self.tts_thread.finished.connect(lambda: self._play_audio(audio_file))
-            self.tts_thread.error.connect(lambda e: self.update_status_signal.emit(f"語音合成錯誤：{e}"))
-            self.tts_thread.start()
+            # 加入朗讀佇列（依序播放，不會因前一句尚未完成而略過）
+            self.utterance_queue.enqueue(text, voice)
             
         except Exception as e:
             print(f"語音播放錯誤：{str(e)}")
             self.update_status_signal.emit(f"語音播放錯誤：{str(e)}")
 
-    def _play_audio(self, audio_file):
-        """播放音頻文件"""
-        try:
-            if not self.is_muted and os.path.exists(audio_file):
-                # 等待文件完全寫入
-                time.sleep(0.2)
-                
-                pygame.mixer.music.load(audio_file)
-                pygame.mixer.music.play()
-                
-                # 等待播放完成
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                    
-                # 確保播放完成後再刪除
-                pygame.mixer.music.unload()
-                time.sleep(0.1)
-                
-                # 刪除臨時文件
-                try:
-                    if os.path.exists(audio_file):
-                        os.remove(audio_file)
-                except Exception as e:
-                    print(f"刪除臨時文件失敗：{str(e)}")
-                
-        except Exception as e:
-            print(f"播放音頻失敗：{str(e)}")
-            self.update_status_signal.emit(f"播放音頻失敗：{str(e)}")
-
     def get_voice_for_language(self, lang_code):
         """獲取語言對應的語音"""
         voice_mapping = {
@@ -870,10 +1145,14 @@ class TranslatorApp(QMainWindow):
             
             # 如果文本不為空，執行翻譯
             if current_text.strip():
-                # 使用 QTimer 延遲執行翻譯，避免打字時頻繁翻譯
-                QTimer.singleShot(1000, self.translate_text)
+                # 重新啟動延遲計時器，避免打字時頻繁翻譯
+                if self.translate_timer.isActive():
+                    self.debounce_skipped += 1
+                self.translate_timer.start(self.translate_debounce_ms)
             else:
-                # 如果文本為空，清空翻譯結果
+                # 如果文本為空，取消待執行與進行中的翻譯並清空翻譯結果
+                self.translate_timer.stop()
+                self.translate_generation += 1
                 self.translation_text.clear()
 
     def reverse_translate(self):
@@ -881,64 +1160,108 @@ class TranslatorApp(QMainWindow):
         text = self.translation_text.toPlainText()
         if not text:
             return
-            
-        try:
-            self.update_status_signal.emit("正在反向翻譯...")
-            
-            last_line = text.strip().split('\n')[-1]
-            target_lang = self.get_language_code(self.target_lang.currentText())
-            source_lang = self.get_language_code(self.source_lang.currentText())
-            
-            # 先將輸入文本翻譯成目標語言（檢查並修正語法）
-            corrected_translation = self.translator.translate(
-                last_line,
-                src=target_lang,
-                dest=target_lang
-            )
-            
-            if corrected_translation and corrected_translation.text:
-                # 使用修正後的文本進行翻譯
-                translation = self.translator.translate(
-                    corrected_translation.text,
-                    src=target_lang,
-                    dest=source_lang
-                )
+        
+        self.reverse_generation += 1
+        
+        last_line = text.strip().split('\n')[-1]
+        target_lang = self.get_language_code(self.target_lang.currentText())
+        source_lang = self.get_language_code(self.source_lang.currentText())
+        
+        # 記錄是否來自語音輸入，並立即清除標記
+        from_voice = hasattr(self, '_from_voice_input')
+        if from_voice:
+            delattr(self, '_from_voice_input')
+        
+        self.update_status_signal.emit("正在反向翻譯...")
+        
+        job = TranslationJob(
+            self.reverse_generation,
+            self._reverse_translate_job,
+            (last_line, target_lang, source_lang),
+            context={
+                'last_line': last_line,
+                'source_lang': source_lang,
+                'from_voice': from_voice,
+                'started': time.perf_counter()
+            }
+        )
+        job.signals.finished.connect(self._on_reverse_finished)
+        job.signals.error.connect(self._on_reverse_error)
+        self.translation_pool.start(job)
+
+    def _reverse_translate_job(self, text, target_lang, source_lang):
+        """在工作執行緒中執行反向翻譯，回傳（修正後文本, 翻譯結果）"""
+        return self.reverse_translator.translate(text, target_lang, source_lang)
+
+    @Slot(int, object, object)
+    def _on_reverse_finished(self, generation, context, result):
+        """在主執行緒中套用反向翻譯結果"""
+        if generation != self.reverse_generation:
+            self.stale_results_dropped += 1
+            return
+        
+        self._record_path_timing('reverse', context)
+        corrected_text, translated_text = result
+        if not corrected_text:
+            self.update_status_signal.emit("翻譯失敗")
+            return
+        if not translated_text:
+            self.update_status_signal.emit("反向翻譯失敗")
+            return
+        
+        current_text = self.source_text.toPlainText()
+        if current_text != translated_text:
+            # 只在語音輸入時處理
+            if context['from_voice']:
+                # 更新上方文本框（不觸發事件）
+                self.source_text.blockSignals(True)
+                self.source_text.setText(translated_text)
+                self.source_text.blockSignals(False)
                 
-                if translation and translation.text:
-                    current_text = self.source_text.toPlainText()
-                    if current_text != translation.text:
-                        # 只在語音輸入時處理
-                        if hasattr(self, '_from_voice_input'):
-                            # 更新上方文本框（不觸發事件）
-                            self.source_text.blockSignals(True)
-                            self.source_text.setText(translation.text)
-                            self.source_text.blockSignals(False)
-                            
-                            # 如果文法有被修正，更新下方文本框（不觸發事件）
-                            if corrected_translation.text != last_line:
-                                self.translation_text.blockSignals(True)
-                                self.translation_text.setText(corrected_translation.text)
-                                self.translation_text.blockSignals(False)
-                                
-                            # 添加到歷史記錄
-                            self.add_to_history(corrected_translation.text, translation.text)
-                                
-                            # 朗讀上方的翻譯結果
-                            if not self.is_muted:
-                                QTimer.singleShot(100, lambda: self.speak_translation(translation.text, source_lang))
-                                
-                            # 清除標記
-                            delattr(self, '_from_voice_input')
-                            
-                        self.update_status_signal.emit("反向翻譯完成")
-                else:
-                    self.update_status_signal.emit("反向翻譯失敗")
-            else:
-                self.update_status_signal.emit("翻譯失敗")
-            
-        except Exception as e:
-            print(f"反向翻譯錯誤：{str(e)}")
-            self.update_status_signal.emit(f"反向翻譯錯誤：{str(e)}")
+                # 如果文法有被修正，更新下方文本框（不觸發事件）
+                if corrected_text != context['last_line']:
+                    self.translation_text.blockSignals(True)
+                    self.translation_text.setText(corrected_text)
+                    self.translation_text.blockSignals(False)
+                    
+                # 添加到歷史記錄
+                self.add_to_history(corrected_text, translated_text, is_source_to_target=False)
+                    
+                # 朗讀上方的翻譯結果
+                if not self.is_muted:
+                    source_lang = context['source_lang']
+                    QTimer.singleShot(100, lambda: self.speak_translation(translated_text, source_lang))
+                
+            self.update_status_signal.emit("反向翻譯完成")
+
+    def _record_path_timing(self, path, context):
+        timing = self.path_timings[path]
+        timing['count'] += 1
+        timing['total_ms'] += (time.perf_counter() - context['started']) * 1000
+
+    def translation_stats(self):
+        """正向與反向翻譯的平均延遲，以及反向翻譯各步驟的耗時"""
+        stats = {
+            path: timing['total_ms'] / timing['count'] if timing['count'] else 0.0
+            for path, timing in self.path_timings.items()
+        }
+        return {
+            'avg_forward_ms': stats['forward'],
+            'avg_reverse_ms': stats['reverse'],
+            'reverse_steps': self.reverse_translator.stats(),
+            'speech': {engine.name: engine.stats() for engine in self.speech_recognizers},
+            'voice_capture': self.voice_capture.stats(),
+            'router': self.translation_router.stats(),
+            'history': self.history_model.store.stats()
+        }
+
+    @Slot(int, object, str)
+    def _on_reverse_error(self, generation, context, error):
+        if generation != self.reverse_generation:
+            self.stale_results_dropped += 1
+            return
+        print(f"反向翻譯錯誤：{error}")
+        self.update_status_signal.emit(f"反向翻譯錯誤：{error}")
 
     def swap_languages(self):
         # 
@@ -1000,77 +1323,34 @@ class TranslatorApp(QMainWindow):
         self.toggle_history_button.setText("▼")
         self.show_history_button.hide()  # 隱藏浮動按鈕
 
-    def add_to_history(self, source_text, translated_text):
+    def add_to_history(self, source_text, translated_text, is_source_to_target=None):
         """添加翻譯記錄到歷史"""
         if not source_text or not translated_text:
             return
 
-        # 檢查是否已經存在相同的記錄
-        for i in range(self.history_list.count()):
-            item = self.history_list.item(i)
-            data = item.data(Qt.UserRole)
-            if (data['source_text'] == source_text and 
-                data['translated_text'] == translated_text):
-                return  # 如果存在相同記錄，直接返回
-
-        # 創建歷史記錄項
-        timestamp = QDateTime.currentDateTime().toString("yyyy-MM-dd HH:mm:ss")
-        history_item = QListWidgetItem()
-        
         # 判斷翻譯方向
-        is_source_to_target = not hasattr(self, '_from_voice_input')
-        
-        # 設置項目數據
-        history_data = {
-            'timestamp': timestamp,
-            'source_text': source_text,
-            'translated_text': translated_text,
-            'source_lang': self.source_lang.currentText(),
-            'target_lang': self.target_lang.currentText(),
-            'is_source_to_target': is_source_to_target
-        }
-        history_item.setData(Qt.UserRole, history_data)
-        
-        # 設置顯示文本（只顯示時間戳和方向指示）
-        direction_indicator = "↑上方" if is_source_to_target else "↓下方"
-        history_item.setText(f"[{timestamp}] {direction_indicator}")
-        
-        # 根據翻譯方向設置不同的背景色和文字顏色
-        if is_source_to_target:
-            history_item.setBackground(QColor("#2d2d2d"))
-            history_item.setForeground(QColor("#4CAF50"))  # 綠色
-        else:
-            history_item.setBackground(QColor("#1e1e1e"))
-            history_item.setForeground(QColor("#2196F3"))  # 藍色
+        if is_source_to_target is None:
+            is_source_to_target = not hasattr(self, '_from_voice_input')
         
-        # 添加到列表頂部
-        self.history_list.insertItem(0, history_item)
+        # 重複的記錄由模型以雜湊索引排除，新記錄加在列表頂部
+        self.history_model.add(
+            source_text,
+            translated_text,
+            self.source_lang.currentText(),
+            self.target_lang.currentText(),
+            is_source_to_target
+        )
 
-    def toggle_history_item(self, item):
+    def toggle_history_item(self, index):
         """切換歷史記錄項的展開/折疊狀態"""
-        history_data = item.data(Qt.UserRole)
-        current_text = item.text()
-        
-        # 檢查是否已經展開（通過檢查是否包含換行符）
-        is_expanded = '\n' in current_text
-        
-        if is_expanded:
-            # 如果已展開，則折疊
-            direction_indicator = "↑上方" if history_data['is_source_to_target'] else "↓下方"
-            item.setText(f"[{history_data['timestamp']}] {direction_indicator}")
-        else:
-            # 如果已折疊，則展開
-            direction_indicator = "↑上方" if history_data['is_source_to_target'] else "↓下方"
-            display_text = (
-                f"[{history_data['timestamp']}] {direction_indicator}\n"
-                f"{history_data['source_lang']}: {history_data['source_text']}\n"
-                f"{history_data['target_lang']}: {history_data['translated_text']}"
-            )
-            item.setText(display_text)
+        self.history_model.toggle_expanded(index.row())
+        # 有展開的記錄時列高不一，需改為逐列量測
+        self.history_list.setUniformItemSizes(self.history_model.expanded_count == 0)
 
     def clear_history(self):
         """清除歷史記錄"""
-        self.history_list.clear()
+        self.history_model.clear()
+        self.history_list.setUniformItemSizes(True)
 
     def resizeEvent(self, event):
         """處理視窗大小改變事件"""
@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from segmenter import NO_SPACE_LANGS
+from tts_cache import normalize_text
+
+# 短於此長度的文字不需修正（以空白分隔的語言計字數，中日文計字元數）
+SHORT_WORDS = 2
+SHORT_CHARS = 4
+
+
+def needs_correction(text, lang):
+    """本機快速判斷文字是否值得送出修正：沒有文字內容或過短時略過"""
+    stripped = text.strip()
+    if not any(ch.isalpha() for ch in stripped):
+        return False
+    if lang in NO_SPACE_LANGS:
+        return len(stripped) > SHORT_CHARS
+    return len(stripped.split()) > SHORT_WORDS
+
+
+class ReverseTranslator:
+    """反向翻譯：先修正（目標語言 -> 目標語言）再翻回來源語言
+
+    修正結果有快取時直接使用；本機判斷不需修正時略過修正；
+    否則修正與原文翻譯同時進行，只有修正確實改變文字時才重新翻譯修正後的文字
+    """
+
+    def __init__(self, translator, cache=None, max_workers=4):
+        self.translator = translator
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reverse-correct')
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cached_corrections = 0
+        self.skipped_corrections = 0
+        self.concurrent = 0
+        self.retranslated = 0
+        self._correction = 0.0
+        self._translation = 0.0
+        self._total = 0.0
+
+    def _translate(self, text, src, dest):
+        started = time.perf_counter()
+        result = self.translator.translate(text, src=src, dest=dest)
+        return (result.text if result else None), time.perf_counter() - started
+
+    def _cached_correction(self, text, lang):
+        if self.cache is None:
+            return None
+        result = self.cache.get(self.cache.make_key(text, lang, lang))
+        return result.text if result else None
+
+    def translate(self, text, target_lang, source_lang):
+        """回傳（修正後文本, 翻譯結果）；修正失敗時兩者皆為 None"""
+        started = time.perf_counter()
+        correction_time = 0.0
+        path = None
+
+        corrected = self._cached_correction(text, target_lang)
+        if corrected:
+            path = 'cached'
+            translated, translation_time = self._translate(corrected, target_lang, source_lang)
+        elif not needs_correction(text, target_lang):
+            path = 'skipped'
+            corrected = text
+            translated, translation_time = self._translate(text, target_lang, source_lang)
+        else:
+            # 修正在另一個執行緒進行，同時直接翻譯原文；修正通常不改變文字，此時即可採用原文的翻譯
+            path = 'concurrent'
+            correction = self._executor.submit(self._translate, text, target_lang, target_lang)
+            translated, translation_time = self._translate(text, target_lang, source_lang)
+            corrected, correction_time = correction.result()
+            if not corrected:
+                return None, None
+            if normalize_text(corrected) != normalize_text(text):
+                path = 'retranslated'
+                translated, retranslation_time = self._translate(corrected, target_lang, source_lang)
+                translation_time += retranslation_time
+
+        total = time.perf_counter() - started
+        with self._lock:
+            self.requests += 1
+            if path == 'cached':
+                self.cached_corrections += 1
+            elif path == 'skipped':
+                self.skipped_corrections += 1
+            else:
+                self.concurrent += 1
+                if path == 'retranslated':
+                    self.retranslated += 1
+            self._correction += correction_time
+            self._translation += translation_time
+            self._total += total
+        return corrected, translated
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            requests = self.requests
+            return {
+                'requests': requests,
+                'cached_corrections': self.cached_corrections,
+                'skipped_corrections': self.skipped_corrections,
+                'concurrent': self.concurrent,
+                'retranslated': self.retranslated,
+                'avg_correction_ms': self._correction * 1000 / requests if requests else 0.0,
+                'avg_translation_ms': self._translation * 1000 / requests if requests else 0.0,
+                'avg_total_ms': self._total * 1000 / requests if requests else 0.0
+            }
@@ -0,0 +1,102 @@
+import re
+import threading
+from collections import OrderedDict
+
+# 句子結尾：中日文標點、英文標點（後接空白或結尾）、換行
+_SEGMENT_RE = re.compile(
+    r'(\S.*?(?:[。！？!?…]+[」』”’"\')）]*|\.(?=\s|$)|(?=\n)|$))(\s*)',
+    re.S
+)
+
+# 不以空白分隔句子的語言
+NO_SPACE_LANGS = ('zh-TW', 'zh-CN', 'ja')
+
+
+def split_segments(text):
+    """將文字切成句子，回傳 [(句子, 後面的分隔空白), ...]"""
+    return [(m.group(1).strip(), m.group(2)) for m in _SEGMENT_RE.finditer(text or '') if m.group(1).strip()]
+
+
+def join_segments(pieces, lang):
+    """依原文的分隔方式把翻譯後的句子組合回全文"""
+    parts = []
+    for i, (segment, separator) in enumerate(pieces):
+        parts.append(segment)
+        if i == len(pieces) - 1:
+            break
+        if '\n' in separator:
+            parts.append('\n' * separator.count('\n'))
+        elif lang not in NO_SPACE_LANGS:
+            parts.append(' ')
+    return ''.join(parts)
+
+
+def chunk_text(text, max_chars=120):
+    """依句子邊界切成不超過 max_chars 的段落（單句過長時保留整句），用於分段語音合成"""
+    chunks = []
+    current = ''
+    for segment, separator in split_segments(text):
+        if current and len(current) + len(segment) > max_chars:
+            chunks.append(current.strip())
+            current = ''
+        current += segment + separator
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+class SegmentTranslator:
+    """逐句翻譯：只有新增或修改過的句子才送往上游，全文由逐句翻譯表組合"""
+
+    def __init__(self, translator, max_entries=4096):
+        self.translator = translator
+        self.max_entries = max_entries
+        self._table = OrderedDict()  # (src, dest, 句子) -> 翻譯
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.reused = 0
+
+    def translate(self, text, src, dest, on_partial=None):
+        """翻譯全文，回傳（完整譯文, 本次新翻譯的 [(句子, 譯文), ...]）
+
+        提供 on_partial 且上游支援串流時，每收到一個片段就以目前的部分全文呼叫一次
+        """
+        pieces = []
+        new_segments = []
+        for segment, separator in split_segments(text):
+            key = (src, dest, segment)
+            with self._lock:
+                translated = self._table.get(key)
+                if translated is not None:
+                    self._table.move_to_end(key)
+                    self.reused += 1
+            if translated is None:
+                if on_partial and hasattr(self.translator, 'stream'):
+                    translated = self._stream_segment(segment, separator, src, dest, pieces, on_partial)
+                else:
+                    translation = self.translator.translate(segment, src=src, dest=dest)
+                    translated = translation.text if translation else ''
+                with self._lock:
+                    self.upstream_calls += 1
+                    if translated:
+                        self._table[key] = translated
+                        while len(self._table) > self.max_entries:
+                            self._table.popitem(last=False)
+                new_segments.append((segment, translated))
+            pieces.append((translated, separator))
+        return join_segments(pieces, dest), new_segments
+
+    def _stream_segment(self, segment, separator, src, dest, pieces, on_partial):
+        parts = []
+        for token in self.translator.stream(segment, src=src, dest=dest):
+            parts.append(token)
+            on_partial(join_segments(pieces + [(''.join(parts).strip(), separator)], dest))
+        return ''.join(parts).strip()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'segments': len(self._table),
+                'upstream_calls': self.upstream_calls,
+                'reused': self.reused
+            }
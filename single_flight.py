@@ -0,0 +1,90 @@
+import asyncio
+
+
+class _SharedStream:
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.condition = asyncio.Condition()
+        self.task = None
+
+
+class SingleFlight:
+    """合併相同鍵的進行中請求，讓同時到達的重複請求共用一次上游呼叫"""
+
+    def __init__(self):
+        self._calls = {}  # key -> asyncio.Task
+        self._streams = {}  # key -> _SharedStream
+        self.calls = 0  # 實際發出的上游呼叫數
+        self.shared = 0  # 因合併而省下的呼叫數
+
+    async def do(self, key, func, *args, **kwargs):
+        """執行 func(*args, **kwargs)；若相同鍵已在進行中則等待同一結果"""
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+        # 單一等待者逾時或取消不影響其他等待者
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # 避免無人等待時出現未取回例外的警告
+
+    async def stream(self, key, func, *args, **kwargs):
+        """合併相同鍵的串流請求；後到者會先收到已產生的區塊，再接續即時區塊"""
+        shared = self._streams.get(key)
+        if shared is None:
+            self.calls += 1
+            shared = _SharedStream()
+            self._streams[key] = shared
+            shared.task = asyncio.ensure_future(self._produce(key, shared, func(*args, **kwargs)))
+        else:
+            self.shared += 1
+
+        index = 0
+        while True:
+            async with shared.condition:
+                await shared.condition.wait_for(
+                    lambda: index < len(shared.chunks) or shared.done)
+                chunks = shared.chunks[index:]
+                finished = shared.done
+            for chunk in chunks:
+                yield chunk
+            index += len(chunks)
+            if finished and index >= len(shared.chunks):
+                if shared.error:
+                    raise shared.error
+                return
+
+    async def _produce(self, key, shared, chunks):
+        # 上游串流獨立執行，任何一個用戶端中斷都不會影響其他用戶端
+        try:
+            async for chunk in chunks:
+                async with shared.condition:
+                    shared.chunks.append(chunk)
+                    shared.condition.notify_all()
+        except Exception as e:
+            shared.error = e
+        finally:
+            async with shared.condition:
+                shared.done = True
+                shared.condition.notify_all()
+            if self._streams.get(key) is shared:
+                del self._streams[key]
+
+    def stats(self):
+        total = self.calls + self.shared
+        return {
+            'in_flight': len(self._calls) + len(self._streams),
+            'upstream_calls': self.calls,
+            'saved_calls': self.shared,
+            'saved_ratio': self.shared / total if total else 0.0
+        }
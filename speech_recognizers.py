@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+
+import speech_recognition as sr
+
+from segmenter import NO_SPACE_LANGS
+
+
+class SpeechRecognizer:
+    """語音辨識後端介面
+
+    recognize() 辨識一段完整的 sr.AudioData；recognize_stream() 在語句進行中逐一接收 PCM 音框，
+    支援串流的後端會以 on_partial 回報暫定結果。兩者皆回傳最終文字（無法辨識時為空字串）
+    """
+
+    name = 'recognizer'
+    streaming = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self._audio_seconds = 0.0
+        self._processing_seconds = 0.0
+        self._final_latency = 0.0
+
+    def supports(self, language):
+        return True
+
+    def recognize(self, audio, language):
+        raise NotImplementedError
+
+    def recognize_stream(self, frames, language, sample_rate, sample_width=2, on_partial=None):
+        # 預設：收集完整語句後一次辨識
+        data = b''.join(frames)
+        started = time.perf_counter()
+        try:
+            text = self.recognize(sr.AudioData(data, sample_rate, sample_width), language)
+        except Exception:
+            self._fail()
+            raise
+        elapsed = time.perf_counter() - started
+        self._record(len(data) / (sample_rate * sample_width), elapsed, elapsed)
+        return text
+
+    def _record(self, audio_seconds, processing_seconds, final_latency):
+        with self._lock:
+            self.requests += 1
+            self._audio_seconds += audio_seconds
+            self._processing_seconds += processing_seconds
+            self._final_latency += final_latency
+
+    def _fail(self):
+        with self._lock:
+            self.failures += 1
+
+    def stats(self):
+        with self._lock:
+            requests = self.requests
+            return {
+                'requests': requests,
+                'failures': self.failures,
+                'streaming': self.streaming,
+                'audio_seconds': self._audio_seconds,
+                # 即時係數：處理時間 / 音訊長度，小於 1 表示比即時更快
+                'real_time_factor': self._processing_seconds / self._audio_seconds if self._audio_seconds else 0.0,
+                'avg_final_latency_ms': self._final_latency * 1000 / requests if requests else 0.0
+            }
+
+
+class GoogleRecognizer(SpeechRecognizer):
+    """speech_recognition 的 recognize_google（需要網路，語句結束後一次辨識）"""
+
+    name = 'google'
+
+    def __init__(self, recognizer=None):
+        super().__init__()
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def recognize(self, audio, language):
+        try:
+            return self.recognizer.recognize_google(audio, language=language)
+        except sr.UnknownValueError:
+            return ''
+
+
+class VoskRecognizer(SpeechRecognizer):
+    """Vosk 離線辨識（僅使用 CPU），邊說邊產生暫定結果
+
+    model_dir 底下每個語言一個模型目錄，以語言代碼命名（例如 en、zh-TW；找不到時改查 zh）
+    vosk 套件在第一次載入模型時才匯入
+    """
+
+    name = 'vosk'
+    streaming = True
+
+    def __init__(self, model_dir, sample_rate=16000):
+        super().__init__()
+        self.model_dir = model_dir
+        self.sample_rate = sample_rate
+        self._models = {}
+        self._model_lock = threading.Lock()
+
+    def _model_path(self, language):
+        for name in (language, language.split('-')[0]):
+            path = os.path.join(self.model_dir, name)
+            if os.path.isdir(path):
+                return path
+        return None
+
+    def supports(self, language):
+        return self._model_path(language) is not None
+
+    def _model(self, language):
+        path = self._model_path(language)
+        if path is None:
+            raise ValueError(f'no vosk model for {language} in {self.model_dir}')
+        with self._model_lock:
+            model = self._models.get(path)
+            if model is None:
+                import vosk
+                vosk.SetLogLevel(-1)
+                model = vosk.Model(path)
+                self._models[path] = model
+            return model
+
+    @staticmethod
+    def _join(words, language):
+        text = ' '.join(w for w in words if w)
+        if language in NO_SPACE_LANGS:
+            text = text.replace(' ', '')
+        return text
+
+    def recognize(self, audio, language):
+        data = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        chunk = self.sample_rate * 2 // 10
+        frames = (data[i:i + chunk] for i in range(0, len(data), chunk))
+        return self.recognize_stream(frames, language, self.sample_rate)
+
+    def recognize_stream(self, frames, language, sample_rate, sample_width=2, on_partial=None):
+        import vosk
+        recognizer = vosk.KaldiRecognizer(self._model(language), sample_rate)
+        committed = []
+        processing = 0.0
+        audio_bytes = 0
+        try:
+            for frame in frames:
+                audio_bytes += len(frame)
+                started = time.perf_counter()
+                if recognizer.AcceptWaveform(frame):
+                    committed.append(json.loads(recognizer.Result()).get('text', ''))
+                    partial = ''
+                else:
+                    partial = json.loads(recognizer.PartialResult()).get('partial', '')
+                processing += time.perf_counter() - started
+                if on_partial and (partial or committed):
+                    on_partial(self._join(committed + [partial], language))
+            started = time.perf_counter()
+            committed.append(json.loads(recognizer.FinalResult()).get('text', ''))
+            final_latency = time.perf_counter() - started
+        except Exception:
+            self._fail()
+            raise
+        self._record(audio_bytes / (sample_rate * sample_width), processing + final_latency, final_latency)
+        return self._join(committed, language)
+
+
+def pick_recognizer(recognizers, language):
+    """依順序選出第一個支援該語言的辨識後端"""
+    for recognizer in recognizers:
+        if recognizer.supports(language):
+            return recognizer
+    return recognizers[-1]
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from deepseek_api import DeepseekAPI, AsyncDeepseekAPI
+
+COMPLETION = {"choices": [{"message": {"role": "assistant", "content": "你好"}}]}
+TOKENS = ["你", "好", "，世界！"]
+
+
+def json_response(data, status=200, headers=None, delay=0.0):
+    return status, dict(headers or {}, **{"Content-Type": "application/json"}), [json.dumps(data).encode('utf-8')], delay
+
+
+def sse_response(tokens, delay=0.0):
+    # 與 Deepseek 相同：text/event-stream 不標示字元集，內容為 UTF-8
+    chunks = [
+        f"data: {json.dumps({'choices': [{'delta': {'content': token}}]}, ensure_ascii=False)}\n\n".encode('utf-8')
+        for token in tokens
+    ]
+    chunks.append(b"data: [DONE]\n\n")
+    return 200, {"Content-Type": "text/event-stream"}, chunks, delay
+
+
+def status_response(status, headers=None):
+    return status, dict(headers or {}, **{"Content-Type": "application/json"}), [b'{"error": "busy"}'], 0.0
+
+
+class StandInServer:
+    """本機替代的 Deepseek 端點：依序回應預先排定的回應，並記錄收到的請求"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                server.requests.append((self.path, json.loads(self.rfile.read(length) or b'null')))
+                status, headers, chunks, delay = server.responses.pop(0)
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    for chunk in chunks:
+                        self.wfile.write(chunk)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+def make_client(server, **kwargs):
+    kwargs.setdefault('backoff', 0)
+    return DeepseekAPI('test-key', base_url=server.url, **kwargs)
+
+
+def run_async(server, coro_fn, **kwargs):
+    kwargs.setdefault('backoff', 0)
+
+    async def main():
+        api = AsyncDeepseekAPI('test-key', base_url=server.url, **kwargs)
+        try:
+            return await coro_fn(api), api.stats()
+        finally:
+            await api.close()
+    return asyncio.run(main())
+
+
+def test_sync_retries_503_then_succeeds(server):
+    server.responses = [status_response(503), json_response(COMPLETION)]
+    api = make_client(server)
+    assert api.create_chat_completion([{"role": "user", "content": "hi"}]) == COMPLETION
+    assert len(server.requests) == 2
+    assert server.requests[0][0] == '/v1/chat/completions'
+    assert api.stats()['failures'] == 0
+
+
+def test_sync_honours_retry_after(server):
+    server.responses = [status_response(503, {"Retry-After": "1"}), json_response(COMPLETION)]
+    api = make_client(server)
+    started = time.perf_counter()
+    assert api.create_chat_completion([{"role": "user", "content": "hi"}]) == COMPLETION
+    assert time.perf_counter() - started >= 0.9
+
+
+def test_sync_read_timeout_is_retried_then_raised(server):
+    server.responses = [json_response(COMPLETION, delay=0.5), json_response(COMPLETION, delay=0.5)]
+    api = make_client(server, timeout=(1, 0.1), retries=1)
+    with pytest.raises(requests.RequestException):
+        api.create_chat_completion([{"role": "user", "content": "hi"}])
+    assert len(server.requests) == 2
+    assert api.stats()['failures'] == 1
+
+
+def test_sync_stream_decodes_utf8_tokens(server):
+    server.responses = [sse_response(TOKENS)]
+    api = make_client(server)
+    assert list(api.stream_chat_completion([{"role": "user", "content": "hi"}])) == TOKENS
+    assert server.requests[0][1]['stream'] is True
+    assert api.stats()['streams'] == 1
+
+
+def test_async_retries_503_then_succeeds(server):
+    server.responses = [status_response(503), json_response(COMPLETION)]
+    result, stats = run_async(server, lambda api: api.create_chat_completion([{"role": "user", "content": "hi"}]))
+    assert result == COMPLETION
+    assert len(server.requests) == 2
+    assert stats['failures'] == 0
+
+
+def test_async_honours_retry_after(server):
+    server.responses = [status_response(503, {"Retry-After": "1"}), json_response(COMPLETION)]
+    started = time.perf_counter()
+    result, _ = run_async(server, lambda api: api.create_chat_completion([{"role": "user", "content": "hi"}]))
+    assert result == COMPLETION
+    assert time.perf_counter() - started >= 0.9
+
+
+def test_async_read_timeout_is_retried_then_raised(server):
+    server.responses = [json_response(COMPLETION, delay=0.5), json_response(COMPLETION, delay=0.5)]
+    with pytest.raises(asyncio.TimeoutError):
+        run_async(
+            server,
+            lambda api: api.create_chat_completion([{"role": "user", "content": "hi"}]),
+            timeout=(1, 0.1), retries=1
+        )
+    assert len(server.requests) == 2
+
+
+def test_async_stream_decodes_utf8_tokens(server):
+    server.responses = [sse_response(TOKENS)]
+
+    async def collect(api):
+        return [token async for token in api.stream_chat_completion([{"role": "user", "content": "hi"}])]
+    tokens, stats = run_async(server, collect)
+    assert tokens == TOKENS
+    assert stats['streams'] == 1
@@ -0,0 +1,386 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from translation_cache import TranslationResult
+from deepseek_translator import DeepseekTranslator
+
+# 每個後端保留最近幾次呼叫的延遲用於計算百分位數
+DEFAULT_WINDOW = 256
+# 樣本數不足時使用固定的對沖等待時間（秒）
+DEFAULT_HEDGE_AFTER = 1.0
+MIN_HEDGE_AFTER = 0.05
+MIN_SAMPLES = 20
+# 可用的後端名稱；未指定時有 Deepseek 金鑰則優先使用 Deepseek
+BACKEND_NAMES = ('google', 'deepseek', 'local')
+
+
+class TranslationBackend:
+    """翻譯後端介面：translate() 回傳 TranslationResult，支援串流的後端另提供 stream()
+
+    fallback_only 的後端不參與延遲排序與對沖，只在其他後端全部失敗時使用
+    """
+
+    name = 'backend'
+    fallback_only = False
+
+    def translate(self, text, src='auto', dest='en'):
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    """googletrans（非官方 Google 翻譯端點）"""
+
+    name = 'google'
+
+    def __init__(self, translator=None):
+        if translator is None:
+            from googletrans import Translator
+            translator = Translator()
+        self.translator = translator
+
+    def translate(self, text, src='auto', dest='en'):
+        translation = self.translator.translate(text, src=src, dest=dest)
+        return TranslationResult(translation.text, translation.src, translation.dest)
+
+
+class DeepseekBackend(TranslationBackend):
+    """以 DeepseekTranslator 翻譯，支援逐字串流"""
+
+    name = 'deepseek'
+
+    def __init__(self, translator):
+        self.translator = translator
+
+    def translate(self, text, src='auto', dest='en'):
+        return self.translator.translate(text, src=src, dest=dest)
+
+    def stream(self, text, src='auto', dest='en'):
+        return self.translator.stream(text, src=src, dest=dest)
+
+
+class LocalBackend(TranslationBackend):
+    """本機替代後端：查詢固定詞彙表，查無時原文照回；用於離線或測試路由
+
+    回應幾乎不花時間，若參與排序會永遠被選為主要後端，因此僅作為最後的容錯轉移
+    """
+
+    name = 'local'
+    fallback_only = True
+
+    def __init__(self, phrases=None, delay=0.0):
+        self.phrases = phrases or {}  # (原文, 目標語言) -> 譯文
+        self.delay = delay
+
+    def translate(self, text, src='auto', dest='en'):
+        if self.delay:
+            time.sleep(self.delay)
+        return TranslationResult(self.phrases.get((text, dest), text), src, dest)
+
+
+def create_backends(names=None, deepseek_api=None):
+    """依逗號分隔的名稱建立翻譯後端
+
+    names 未指定時，有 deepseek_api 則為 deepseek,google，否則為 google；
+    未設定 Deepseek 金鑰（deepseek_api 為 None）時略過 deepseek，未知的名稱拋出 ValueError
+    """
+    if not names:
+        names = 'deepseek,google' if deepseek_api else 'google'
+    backends = []
+    for name in names.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in BACKEND_NAMES:
+            raise ValueError(f'unknown translation backend: {name}')
+        if name == 'google':
+            backends.append(GoogleBackend())
+        elif name == 'deepseek':
+            if deepseek_api is None:
+                print("未設定 DEEPSEEK_API_KEY，略過 deepseek 翻譯後端")
+                continue
+            backends.append(DeepseekBackend(DeepseekTranslator(deepseek_api)))
+        else:
+            backends.append(LocalBackend())
+    if all(backend.fallback_only for backend in backends):
+        # 至少保留一個真正的翻譯後端
+        backends.insert(0, GoogleBackend())
+    return backends
+
+
+class LatencyTracker:
+    """記錄單一後端最近的呼叫延遲與成功率"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self._samples = deque(maxlen=window)  # (秒數, 是否成功)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self._samples.append((seconds, ok))
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+
+    def win(self):
+        with self._lock:
+            self.wins += 1
+
+    def percentile(self, p):
+        with self._lock:
+            latencies = sorted(seconds for seconds, ok in self._samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def samples(self):
+        with self._lock:
+            return len(self._samples)
+
+    def success_rate(self):
+        with self._lock:
+            if not self._samples:
+                return 1.0
+            return sum(1 for _, ok in self._samples if ok) / len(self._samples)
+
+    def stats(self):
+        p50, p95, p99 = (self.percentile(p) for p in (50, 95, 99))
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'wins': self.wins,
+                'p50_ms': p50 * 1000 if p50 is not None else None,
+                'p95_ms': p95 * 1000 if p95 is not None else None,
+                'p99_ms': p99 * 1000 if p99 is not None else None
+            }
+
+
+class BackendRouter:
+    """依延遲百分位數選擇翻譯後端；主要後端超過期限仍未回應時，對下一個後端送出對沖請求並採用先完成的結果
+
+    介面與 googletrans.Translator 相容，可直接由 CachedTranslator 包裝
+    """
+
+    def __init__(self, backends, hedge_after=None, max_workers=8, window=DEFAULT_WINDOW):
+        if not backends:
+            raise ValueError('at least one translation backend is required')
+        self.backends = list(backends)
+        self.hedge_after = hedge_after
+        self._trackers = {backend.name: LatencyTracker(window) for backend in self.backends}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='translate-backend')
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.routed = {backend.name: 0 for backend in self.backends}
+
+    @property
+    def can_stream(self):
+        return any(hasattr(backend, 'stream') for backend in self.backends)
+
+    def ranked(self):
+        """依預估延遲排序後端：p50 除以成功率，尚無樣本者依設定順序優先嘗試；
+        fallback_only 的後端不參與排序，依設定順序排在最後"""
+        def score(item):
+            index, backend = item
+            if backend.fallback_only:
+                return (2, 0.0, index)
+            tracker = self._trackers[backend.name]
+            p50 = tracker.percentile(50)
+            if p50 is None:
+                # 尚無樣本者優先嘗試；只有失敗樣本者排在有成功樣本者之後
+                return (0, 0.0, index) if not tracker.samples() else (1, float('inf'), index)
+            return (1, p50 / max(tracker.success_rate(), 0.05), index)
+        return [backend for _, backend in sorted(enumerate(self.backends), key=score)]
+
+    @staticmethod
+    def _next_hedge(fallbacks):
+        # 對沖只送給真正的翻譯後端，替代後端留給容錯轉移
+        for backend in fallbacks:
+            if not backend.fallback_only:
+                fallbacks.remove(backend)
+                return backend
+        return None
+
+    def _deadline(self, backend):
+        if self.hedge_after is not None:
+            return self.hedge_after
+        tracker = self._trackers[backend.name]
+        if tracker.samples() < MIN_SAMPLES:
+            return DEFAULT_HEDGE_AFTER
+        return max(MIN_HEDGE_AFTER, tracker.percentile(95) or DEFAULT_HEDGE_AFTER)
+
+    def _call(self, backend, text, src, dest):
+        started = time.perf_counter()
+        try:
+            result = backend.translate(text, src=src, dest=dest)
+        except Exception:
+            self._trackers[backend.name].record(time.perf_counter() - started, False)
+            raise
+        ok = bool(result and result.text)
+        self._trackers[backend.name].record(time.perf_counter() - started, ok)
+        if not ok:
+            raise RuntimeError(f'{backend.name} returned an empty translation')
+        return result
+
+    def translate(self, text, src='auto', dest='en'):
+        ranked = self.ranked()
+        primary = ranked[0]
+        with self._lock:
+            self.requests += 1
+            self.routed[primary.name] += 1
+
+        futures = {self._executor.submit(self._call, primary, text, src, dest): primary}
+        fallbacks = deque(ranked[1:])
+        hedged = False
+        error = None
+        done, _ = wait(futures, timeout=self._deadline(primary))
+        while True:
+            for future in done:
+                backend = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                self._trackers[backend.name].win()
+                if hedged and backend is not primary:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return result
+
+            if not done:
+                # 主要後端逾時：對下一個後端送出對沖請求
+                backend = self._next_hedge(fallbacks)
+                if backend is not None:
+                    with self._lock:
+                        self.hedged += 1
+                    hedged = True
+                    futures[self._executor.submit(self._call, backend, text, src, dest)] = backend
+            elif not futures:
+                if not fallbacks:
+                    raise error
+                # 已送出的請求全數失敗：容錯轉移到下一個後端
+                backend = fallbacks.popleft()
+                with self._lock:
+                    self.failovers += 1
+                futures[self._executor.submit(self._call, backend, text, src, dest)] = backend
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+    def _pump_stream(self, backend, text, src, dest, tokens, cancelled):
+        # 在執行緒池中讀取串流，依序放入 tokens：('token', 片段)、('done', 是否收到片段)、('error', 例外)
+        tracker = self._trackers[backend.name]
+        started = time.perf_counter()
+        received = False
+        stream = None
+        try:
+            stream = iter(backend.stream(text, src=src, dest=dest))
+            for token in stream:
+                if cancelled.is_set():
+                    return
+                received = True
+                tokens.put(('token', token))
+        except Exception as e:
+            tracker.record(time.perf_counter() - started, False)
+            tokens.put(('error', e))
+            return
+        finally:
+            # 關閉串流以釋放上游連線（用戶端中斷或對沖後端勝出時）
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+        tracker.record(time.perf_counter() - started, received)
+        tokens.put(('done', received))
+
+    def stream(self, text, src='auto', dest='en'):
+        """由預估最快的後端串流；第一個片段超過期限仍未到達時，對下一個後端送出對沖請求（一次取得完整譯文），
+        採用先到達的結果。主要後端不支援串流，或尚未輸出片段就失敗時，改由其他後端翻譯"""
+        ranked = self.ranked()
+        primary = ranked[0]
+        if not hasattr(primary, 'stream'):
+            yield self.translate(text, src=src, dest=dest).text
+            return
+
+        with self._lock:
+            self.requests += 1
+            self.routed[primary.name] += 1
+        tokens = queue.Queue()
+        cancelled = threading.Event()
+        self._executor.submit(self._pump_stream, primary, text, src, dest, tokens, cancelled)
+        fallbacks = deque(ranked[1:])
+        hedge = hedge_backend = None
+        try:
+            try:
+                kind, value = tokens.get(timeout=self._deadline(primary))
+            except queue.Empty:
+                hedge_backend = self._next_hedge(fallbacks)
+                if hedge_backend is not None:
+                    with self._lock:
+                        self.hedged += 1
+                    hedge = self._executor.submit(self._call, hedge_backend, text, src, dest)
+                    hedge.add_done_callback(lambda future: tokens.put(('hedge', future)))
+                kind, value = tokens.get()
+            if kind == 'hedge' and value.exception() is not None:
+                # 對沖請求失敗，繼續等待主要後端
+                kind, value = tokens.get()
+
+            if kind == 'hedge':
+                # 對沖後端先完成，放棄主要後端的串流
+                self._trackers[hedge_backend.name].win()
+                with self._lock:
+                    self.hedge_wins += 1
+                yield value.result().text
+                return
+            if kind != 'token':
+                # 尚未輸出任何片段就失敗：改由其他後端翻譯
+                if len(self.backends) == 1:
+                    if kind == 'error':
+                        raise value
+                    return
+                with self._lock:
+                    self.failovers += 1
+                if hedge is not None:
+                    try:
+                        yield hedge.result().text
+                        return
+                    except Exception:
+                        pass
+                yield self.translate(text, src=src, dest=dest).text
+                return
+
+            self._trackers[primary.name].win()
+            while kind == 'token':
+                yield value
+                kind, value = tokens.get()
+                if kind == 'hedge':
+                    kind, value = tokens.get()
+            if kind == 'error':
+                raise value
+        finally:
+            cancelled.set()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            requests = self.requests
+            summary = {
+                'requests': requests,
+                'hedged': self.hedged,
+                'hedge_rate': self.hedged / requests if requests else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'failovers': self.failovers,
+                'routed': dict(self.routed)
+            }
+        summary['order'] = [backend.name for backend in self.ranked()]
+        summary['backends'] = {name: tracker.stats() for name, tracker in self._trackers.items()}
+        return summary
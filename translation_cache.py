@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from tts_cache import normalize_text
+
+# 預設記憶體快取筆數與有效期限（7 天）
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL = 7 * 24 * 3600
+
+TranslationResult = namedtuple('TranslationResult', ['text', 'src', 'dest'])
+
+
+def is_cacheable(text, result, src, dest):
+    """譯文與原文相同的跨語言結果（例如替代後端原文照回）不寫入快取；同語言修正則照常快取"""
+    if not result.text:
+        return False
+    return src == dest or normalize_text(result.text) != normalize_text(text)
+
+
+class TranslationCache:
+    """兩層翻譯快取：記憶體 LRU 在前，SQLite 持久化儲存在後"""
+
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (TranslationResult, 建立時間)
+        self._lock = threading.Lock()  # 只保護記憶體快取與統計，不跨 SQLite 操作
+        self._db_lock = threading.Lock()  # 寫入與清理共用的連線
+        self._local = threading.local()  # 每個執行緒各自的唯讀連線
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lookup_seconds = 0.0
+        self.purged = 0
+        self.last_purge = None
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        # WAL 模式讓多個工作程序可以同時讀寫同一個快取檔
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                src TEXT,
+                dest TEXT,
+                created REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_created ON translations (created)")
+        self._conn.commit()
+
+    def _reader(self):
+        # WAL 模式下讀取不互相阻擋，各執行緒以自己的連線同時查詢
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(text, src, dest):
+        """依（來源語言、目標語言、正規化文字）計算快取鍵"""
+        raw = '\x1f'.join([src or 'auto', dest or '', normalize_text(text)])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """查詢快取，依序檢查記憶體與 SQLite，未命中回傳 None"""
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self._lookup_seconds += time.perf_counter() - start
+                return entry[0]
+            if entry:
+                del self._memory[key]
+
+        # SQLite 查詢不持有鎖，避免所有翻譯執行緒排隊等待磁碟 I/O
+        row = self._reader().execute(
+            "SELECT text, src, dest, created FROM translations WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        with self._lock:
+            if row and now - row[3] < self.ttl:
+                result = TranslationResult(row[0], row[1], row[2])
+                self._remember_locked(key, result, row[3])
+                self.disk_hits += 1
+            else:
+                result = None
+                self.misses += 1
+            self._lookup_seconds += time.perf_counter() - start
+        return result
+
+    def put(self, key, result):
+        """寫入兩層快取"""
+        now = time.time()
+        with self._lock:
+            self._remember_locked(key, result, now)
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, text, src, dest, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, result.text, result.src, result.dest, now)
+            )
+            self._conn.commit()
+
+    def _remember_locked(self, key, result, created):
+        self._memory[key] = (result, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self):
+        """刪除 SQLite 中已過期的記錄，回傳刪除筆數"""
+        now = time.time()
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "DELETE FROM translations WHERE created < ?",
+                (now - self.ttl,)
+            )
+            self._conn.commit()
+        with self._lock:
+            self.purged += cursor.rowcount
+            self.last_purge = now
+        return cursor.rowcount
+
+    async def run_purge(self, interval=3600):
+        """定期在執行緒池中清除過期記錄"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.purge_expired)
+            except Exception as e:
+                print(f"翻譯快取清理錯誤：{str(e)}")
+            await asyncio.sleep(interval)
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': hits / lookups if lookups else 0.0,
+                'avg_lookup_ms': self._lookup_seconds * 1000 / lookups if lookups else 0.0,
+                'purged': self.purged,
+                'last_purge': self.last_purge
+            }
+
+
+class CachedTranslator:
+    """包裝 googletrans.Translator，先查快取再呼叫上游"""
+
+    def __init__(self, translator, cache):
+        self.translator = translator
+        self.cache = cache
+
+    def translate(self, text, src='auto', dest='en'):
+        key = self.cache.make_key(text, src, dest)
+        result = self.cache.get(key)
+        if result:
+            return result
+
+        translation = self.translator.translate(text, src=src, dest=dest)
+        result = TranslationResult(translation.text, translation.src, translation.dest)
+        if is_cacheable(text, result, src, dest):
+            self.cache.put(key, result)
+        return result
+
+    def stream(self, text, src='auto', dest='en'):
+        """逐一產生翻譯片段；快取命中或上游不支援串流時一次產生完整譯文"""
+        key = self.cache.make_key(text, src, dest)
+        result = self.cache.get(key)
+        if result:
+            yield result.text
+            return
+
+        if not hasattr(self.translator, 'stream'):
+            result = self.translate(text, src=src, dest=dest)
+            if result.text:
+                yield result.text
+            return
+
+        parts = []
+        for token in self.translator.stream(text, src=src, dest=dest):
+            parts.append(token)
+            yield token
+        result = TranslationResult(''.join(parts).strip(), src, dest)
+        if is_cacheable(text, result, src, dest):
+            self.cache.put(key, result)
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+
+# 預設快取上限：64 MB
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 命中時更新檔案修改時間的最短間隔（秒），讓依修改時間清理的 AudioStore 保留常用語音
+TOUCH_INTERVAL = 3600
+
+
+def normalize_text(text):
+    """正規化文字（Unicode NFC、合併空白）"""
+    text = unicodedata.normalize('NFC', text or '')
+    return ' '.join(text.split())
+
+
+class TTSCache:
+    """以內容雜湊為鍵的語音快取，超過容量時依 LRU 淘汰"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, prefix='tts_'):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self._entries = OrderedDict()  # key -> 檔案大小
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_hits = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """載入磁碟上既有的快取檔，讓快取在重新啟動後仍然有效"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(self.prefix) and name.endswith('.mp3'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, name[len(self.prefix):-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict_locked()
+
+    @staticmethod
+    def make_key(text, voice, rate='+0%', pitch='+0Hz'):
+        """依（正規化文字、語音、語速、音調）計算快取鍵"""
+        raw = '\x1f'.join([normalize_text(text), voice or '', rate or '', pitch or ''])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def filename_for(self, key):
+        return f"{self.prefix}{key}.mp3"
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, self.filename_for(key))
+
+    def temp_path_for(self, key):
+        """寫入用的暫存路徑，完成後以 os.replace 換成正式檔名"""
+        return f"{self.path_for(key)}.{uuid.uuid4().hex}.part"
+
+    def _touch(self, path, stat):
+        # AudioStore 依修改時間清除過期檔案並由最舊的開始淘汰；命中時更新修改時間，
+        # 常用的語音才不會在保存期限到時被刪除。限制更新頻率，避免每次命中都改變 /audio 的 ETag 記憶鍵
+        if time.time() - stat.st_mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def get(self, key):
+        """查詢快取，命中時回傳音頻檔路徑，否則回傳 None"""
+        path = self.path_for(key)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        with self._lock:
+            if key in self._entries:
+                if stat is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self._touch(path, stat)
+                    return path
+                # 檔案已被外部刪除
+                self._total_bytes -= self._entries.pop(key)
+            elif stat is not None:
+                # 由其他工作程序寫入
+                self._entries[key] = stat.st_size
+                self._total_bytes += stat.st_size
+                self.hits += 1
+                self.shared_hits += 1
+                self._touch(path, stat)
+                self._evict_locked()
+                return path
+            self.misses += 1
+            return None
+
+    def put(self, key, temp_path=None):
+        """登記已寫入快取路徑的音頻檔，並依容量淘汰舊項目"""
+        path = self.path_for(key)
+        if temp_path:
+            os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict_locked()
+        return path
+
+    def get_bytes(self, key):
+        """查詢快取，命中時回傳音頻資料"""
+        path = self.get(key)
+        if not path:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_bytes(self, key, data):
+        """將記憶體中的音頻資料寫入快取"""
+        temp_path = self.temp_path_for(key)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        return self.put(key, temp_path)
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path_for(old_key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'shared_hits': self.shared_hits,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
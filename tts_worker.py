@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+import edge_tts
+
+
+def format_rate(speed):
+    """將語速百分比（100 為正常）轉成 edge-tts 格式"""
+    return f"{'+' if speed >= 100 else ''}{speed - 100}%"
+
+
+def format_pitch(pitch):
+    """將音調偏移轉成 edge-tts 格式"""
+    return f"{'+' if pitch >= 0 else ''}{pitch}Hz"
+
+
+class TTSWorker:
+    """常駐背景事件迴圈的語音合成工作者，所有合成工作共用同一個執行緒與事件迴圈"""
+
+    def __init__(self, concurrency=3):
+        self.concurrency = concurrency
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.failures = 0
+        self.threads_started = 0
+        self._queue_wait = 0.0
+        self._first_chunk = 0.0
+        self._synthesis = 0.0
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='tts-worker', daemon=True)
+        self._thread.start()
+        self.threads_started += 1
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
+
+    def submit(self, text, voice, rate='+0%', pitch='+0Hz'):
+        """送出合成工作，回傳 concurrent.futures.Future（結果為 MP3 資料）"""
+        return asyncio.run_coroutine_threadsafe(
+            self._synthesize(text, voice, rate, pitch, time.perf_counter()),
+            self._loop
+        )
+
+    async def _synthesize(self, text, voice, rate, pitch, submitted):
+        async with self._semaphore:
+            started = time.perf_counter()
+            first_chunk = None
+            chunks = []
+            try:
+                # edge-tts 每次合成都會建立新的 websocket 連線，無法跨工作重複使用
+                communicate = edge_tts.Communicate(text, voice, rate=rate, pitch=pitch)
+                async for chunk in communicate.stream():
+                    if chunk['type'] == 'audio':
+                        if first_chunk is None:
+                            first_chunk = time.perf_counter()
+                        chunks.append(chunk['data'])
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                raise
+            finished = time.perf_counter()
+            with self._lock:
+                self.jobs += 1
+                self._queue_wait += started - submitted
+                self._first_chunk += (first_chunk or finished) - started
+                self._synthesis += finished - started
+            return b''.join(chunks)
+
+    def shutdown(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=1)
+
+    def stats(self):
+        with self._lock:
+            jobs = self.jobs
+            return {
+                'jobs': jobs,
+                'failures': self.failures,
+                'concurrency': self.concurrency,
+                'threads_started': self.threads_started,
+                'avg_queue_wait_ms': self._queue_wait * 1000 / jobs if jobs else 0.0,
+                'avg_setup_ms': self._first_chunk * 1000 / jobs if jobs else 0.0,
+                'avg_synthesis_ms': self._synthesis * 1000 / jobs if jobs else 0.0
+            }
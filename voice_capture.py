@@ -0,0 +1,276 @@
+import math
+import queue
+import threading
+import time
+from array import array
+from collections import deque
+
+import speech_recognition as sr
+
+# 取樣設定：16 kHz、每個音框 30 ms
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+# 語音開始前保留的音框（避免切掉第一個音節）
+PRE_ROLL_MS = 300
+# 連續靜音超過此時間視為語句結束
+SILENCE_MS = 700
+# 語音短於此時間視為雜音丟棄
+MIN_SPEECH_MS = 150
+# 開啟裝置後以最初這段時間校正環境音量（僅一次）
+CALIBRATION_MS = 500
+# 門檻 = 環境音量 × 倍率，並依環境音量在背景持續調整
+THRESHOLD_RATIO = 1.5
+MIN_THRESHOLD = 100
+ADAPT_DAMPING = 0.15
+# 開始錄音時等待背景執行緒開啟裝置的最長時間（秒）
+START_TIMEOUT = 3.0
+
+
+def frame_rms(frame, sample_width=2):
+    """計算 16 位元 PCM 音框的 RMS 音量"""
+    if sample_width != 2 or not frame:
+        return 0.0
+    samples = array('h', frame)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class _Request:
+    def __init__(self, deadline, max_frames, streaming=False):
+        self.deadline = deadline
+        self.max_frames = max_frames
+        self.queue = queue.Queue() if streaming else None
+        self.sent = 0
+        self.frames = None  # 偵測到語音後開始收集
+        self.started = None
+        self.voiced = 0
+        self.silent = 0
+        self.audio = None
+        self.done = threading.Event()
+
+
+class VoiceCapture:
+    """常駐的麥克風擷取：裝置只開啟一次，環境門檻在背景調整，以音量 VAD 從環形緩衝區切出語句
+
+    listen() 與 sr.Recognizer.listen() 相同，回傳 sr.AudioData 或拋出 sr.WaitTimeoutError，
+    但不需要每次重新開啟裝置與校正
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, pre_roll_ms=PRE_ROLL_MS,
+                 silence_ms=SILENCE_MS, min_speech_ms=MIN_SPEECH_MS, device_index=None):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.device_index = device_index
+        self.sample_width = 2
+        self.energy_threshold = None
+        self.noise_rms = 0.0
+        self._ring = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self._request = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = threading.Event()
+        self._thread = None
+        self._microphone = None
+        self.error = None
+        self.frames_read = 0
+        self.calibrations = 0
+        self.utterances = 0
+        self.discarded = 0
+        self.timeouts = 0
+        self.open_ms = 0.0
+        self._speech_ms = 0.0
+
+    @property
+    def running(self):
+        return self._started.is_set() and not self._stop.is_set() and self.error is None
+
+    @property
+    def starting(self):
+        """背景執行緒仍在開啟裝置"""
+        return self._thread is not None and not self._started.is_set()
+
+    def start(self, wait=True, timeout=None):
+        """在背景執行緒開啟麥克風並持續讀取；wait 為 True 時等到裝置開啟（或失敗）才返回，最多等待 timeout 秒"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='voice-capture', daemon=True)
+            self._thread.start()
+        if wait:
+            self._started.wait(timeout)
+        return self.running
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self._microphone = sr.Microphone(
+                device_index=self.device_index,
+                sample_rate=self.sample_rate,
+                chunk_size=self.frame_samples
+            )
+            self._microphone.__enter__()
+        except Exception as e:
+            self.error = e
+            self._started.set()
+            return
+        self.sample_width = self._microphone.SAMPLE_WIDTH
+        self.open_ms = (time.perf_counter() - started) * 1000
+        self._started.set()
+        try:
+            self._calibrate()
+            while not self._stop.is_set():
+                self.process_frame(self._microphone.stream.read(self.frame_samples))
+        except Exception as e:
+            self.error = e
+            self._fail_request(e)
+        finally:
+            try:
+                self._microphone.__exit__(None, None, None)
+            except Exception:
+                pass
+
+    def _calibrate(self):
+        # 只在開啟裝置時校正一次，之後由 _adapt 持續追蹤環境音量
+        frames = max(1, CALIBRATION_MS // self.frame_ms)
+        levels = []
+        for _ in range(frames):
+            frame = self._microphone.stream.read(self.frame_samples)
+            self._ring.append(frame)
+            levels.append(frame_rms(frame, self.sample_width))
+        self.set_noise_level(sum(levels) / len(levels))
+
+    def set_noise_level(self, rms):
+        self.noise_rms = rms
+        self.energy_threshold = max(MIN_THRESHOLD, rms * THRESHOLD_RATIO)
+        self.calibrations += 1
+
+    def _adapt(self, rms):
+        damping = ADAPT_DAMPING ** (self.frame_ms / 1000)
+        self.noise_rms = self.noise_rms * damping + rms * (1 - damping)
+        self.energy_threshold = max(MIN_THRESHOLD, self.noise_rms * THRESHOLD_RATIO)
+
+    def process_frame(self, frame):
+        """處理一個音框：更新環境門檻、環形緩衝區，並推進進行中的 listen()"""
+        self.frames_read += 1
+        rms = frame_rms(frame, self.sample_width)
+        if self.energy_threshold is None:
+            self.set_noise_level(rms)
+        with self._lock:
+            request = self._request
+        if (request is None or request.frames is None) and rms <= self.energy_threshold:
+            # 只以語句外的非語音音框更新環境音量（可逐步上升或下降）
+            self._adapt(rms)
+        if request is not None:
+            self._feed(request, frame, rms)
+        self._ring.append(frame)
+
+    def _feed(self, request, frame, rms):
+        speaking = rms > self.energy_threshold
+        if request.frames is None:
+            if not speaking:
+                if time.monotonic() > request.deadline:
+                    self.timeouts += 1
+                    self._finish(request)
+                return
+            # 語音開始：連同環形緩衝區中的前段音框一起收集
+            request.frames = list(self._ring)
+            request.started = time.perf_counter()
+        request.frames.append(frame)
+        if speaking:
+            request.voiced += 1
+            request.silent = 0
+        else:
+            request.silent += 1
+        if request.queue is not None and request.voiced >= self.min_speech_frames:
+            # 確定不是雜音後才把音框交給串流辨識
+            for pending in request.frames[request.sent:]:
+                request.queue.put(pending)
+            request.sent = len(request.frames)
+        if request.silent < self.silence_frames and len(request.frames) < request.max_frames:
+            return
+        if request.voiced < self.min_speech_frames:
+            # 太短，視為雜音，繼續等待下一段語音
+            self.discarded += 1
+            request.frames = None
+            request.voiced = request.silent = 0
+            return
+        self.utterances += 1
+        self._speech_ms += len(request.frames) * self.frame_ms
+        request.audio = sr.AudioData(b''.join(request.frames), self.sample_rate, self.sample_width)
+        self._finish(request)
+
+    def _finish(self, request):
+        with self._lock:
+            if self._request is request:
+                self._request = None
+        if request.queue is not None:
+            request.queue.put(None)
+        request.done.set()
+
+    def _fail_request(self, error):
+        with self._lock:
+            request = self._request
+        if request is not None:
+            self._finish(request)
+
+    def _begin(self, timeout, phrase_time_limit, streaming=False):
+        if not self.running:
+            raise RuntimeError(f'voice capture is not running: {self.error}')
+        max_frames = int(phrase_time_limit * 1000 // self.frame_ms)
+        request = _Request(time.monotonic() + timeout, max_frames, streaming)
+        with self._lock:
+            if self._request is not None:
+                raise RuntimeError('already listening')
+            self._request = request
+        return request
+
+    def _result(self, request):
+        if request.audio is None:
+            if self.error is not None:
+                raise RuntimeError(f'voice capture stopped: {self.error}')
+            raise sr.WaitTimeoutError('listening timed out while waiting for phrase to start')
+        return request.audio
+
+    def listen(self, timeout=5, phrase_time_limit=10):
+        """等待下一句話並回傳 sr.AudioData；timeout 秒內沒有語音時拋出 sr.WaitTimeoutError"""
+        request = self._begin(timeout, phrase_time_limit)
+        request.done.wait(timeout + phrase_time_limit + 1)
+        self._finish(request)
+        return self._result(request)
+
+    def stream(self, timeout=5, phrase_time_limit=10):
+        """與 listen() 相同，但在語句進行中逐一產生 PCM 音框，用於串流辨識"""
+        request = self._begin(timeout, phrase_time_limit, streaming=True)
+        try:
+            while True:
+                try:
+                    frame = request.queue.get(timeout=timeout + phrase_time_limit + 1)
+                except queue.Empty:
+                    break
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            self._finish(request)
+        self._result(request)
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'open_ms': self.open_ms,
+            'frames_read': self.frames_read,
+            'calibrations': self.calibrations,
+            'energy_threshold': self.energy_threshold,
+            'noise_rms': self.noise_rms,
+            'utterances': self.utterances,
+            'discarded': self.discarded,
+            'timeouts': self.timeouts,
+            'avg_utterance_ms': self._speech_ms / self.utterances if self.utterances else 0.0
+        }